@@ -19,5 +19,10 @@ class Settings:
     VERSION: str = "1.0.0"
     DEBUG: bool = os.getenv("DEBUG", "True") == "True"
     PORT: int = int(os.getenv("PORT", "8000"))
+    APP_TIMEZONE: str = os.getenv("APP_TIMEZONE", "America/Mexico_City")
+    
+    # Tareas en segundo plano
+    ADMIN_STATS_REFRESH_SECONDS: int = int(os.getenv("ADMIN_STATS_REFRESH_SECONDS", "300"))
+    CHALLENGE_DAYS_AHEAD: int = int(os.getenv("CHALLENGE_DAYS_AHEAD", "7"))
 
 settings = Settings()
@@ -58,3 +58,69 @@ def execute_query(query: str, params: Optional[tuple] = None, fetch: bool = True
     finally:
         cursor.close()
         connection.close()
+
+# Errores de DDL que indican que el objeto ya existe
+_SCHEMA_EXISTS_ERRORS = {
+    1050,  # Tabla ya existe
+    1060,  # Columna duplicada
+    1061,  # Índice duplicado
+}
+
+def ensure_schema(statements: list):
+    """
+    Ejecuta sentencias DDL idempotentes (tablas, columnas e índices nuevos)
+    ignorando los objetos que ya existen. Cualquier otro error se propaga
+    para que la aplicación no arranque con un esquema incompleto.
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor()
+
+    try:
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+            except Error as e:
+                if e.errno not in _SCHEMA_EXISTS_ERRORS:
+                    print(f"Error aplicando esquema: {e}")
+                    raise
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+def ensure_unique_key(table: str, key_name: str, columns: list, dedupe: list = ()):
+    """
+    Crea un índice único si aún no existe, ejecutando antes las sentencias de
+    `dedupe` que eliminan las filas repetidas que impedirían crearlo.
+    Si el índice no se puede crear el error se propaga.
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor()
+
+    try:
+        cursor.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+        """, (table, key_name))
+        if cursor.fetchone():
+            return
+
+        for statement in dedupe:
+            cursor.execute(statement)
+        connection.commit()
+
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD UNIQUE KEY {key_name} ({', '.join(columns)})")
+        except Error as e:
+            # Otro worker pudo crearlo al mismo tiempo
+            if e.errno != 1061:
+                print(f"Error creando índice único {key_name}: {e}")
+                raise
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
-from datetime import datetime
+from typing import Dict, Optional
+from datetime import date, datetime
 from enum import Enum
 
 # ============================================
@@ -38,6 +38,10 @@ class TargetAudience(str, Enum):
     users = "users"
     admin = "admin"
 
+class RollupGranularity(str, Enum):
+    hour = "hour"
+    day = "day"
+
 class AchievementType(str, Enum):
     streak = "streak"
     quiz = "quiz"
@@ -76,6 +80,14 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+class StreakCalendarCompactResponse(BaseModel):
+    start_date: date
+    end_date: date
+    days: int
+    active_days: int
+    bitmap: str  # base64, bit i = start_date + i días
+    counts_rle: list[list[int]]  # [[actividades, días consecutivos], ...]
+
 # ============================================
 # AUTH MODELS
 # ============================================
@@ -144,6 +156,10 @@ class SignUpdate(BaseModel):
     category_id: Optional[int] = None
     is_active: Optional[bool] = None
 
+class SignBatchRequest(BaseModel):
+    sign_ids: list[int] = Field(..., min_length=1, max_length=300)
+    user_id: Optional[int] = None
+
 class SignResponse(SignBase):
     id: int
     category_id: int
@@ -213,10 +229,15 @@ class QuizQuestionResponse(QuizQuestionBase):
     class Config:
         from_attributes = True
 
+class AdaptiveQuizResponse(BaseModel):
+    session_id: Optional[str] = None  # solo con user_id
+    questions: list[QuizQuestionResponse]
+
 class QuizAttemptCreate(BaseModel):
     quiz_id: int
     answers: dict  # {question_id: answer}
     time_taken: Optional[int] = None
+    adaptive_session: Optional[str] = None  # sesión de /questions/adaptive; None = todas
 
 class QuizAttemptResponse(BaseModel):
     id: int
@@ -232,6 +253,84 @@ class QuizAttemptResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class GeneratedQuestion(BaseModel):
+    index: int
+    sign_id: int
+    question_text: str
+    question_type: QuestionType
+    question_video_url: Optional[str] = None
+    option_1: str
+    option_2: str
+    option_3: str
+    option_4: str
+    points: int
+
+class GeneratedQuizResponse(BaseModel):
+    category_id: int
+    difficulty: Optional[Difficulty] = None
+    count: int
+    seed: int
+    version: str
+    questions: list[GeneratedQuestion]
+
+class GeneratedQuizParams(BaseModel):
+    category_id: int
+    count: int = Field(10, ge=1, le=50)
+    difficulty: Optional[Difficulty] = None
+    seed: int
+    version: Optional[str] = None  # si no coincide, las señas cambiaron desde que se generó
+
+class GeneratedQuizGrade(GeneratedQuizParams):
+    answers: Dict[int, str]  # {index: answer}
+
+class GeneratedQuestionResult(BaseModel):
+    index: int
+    sign_id: int
+    correct: bool
+    correct_answer: str
+
+class GeneratedQuizResult(BaseModel):
+    total_questions: int
+    correct_answers: int
+    score: int
+    score_percentage: float
+    results: list[GeneratedQuestionResult]
+
+class GeneratedQuizSave(GeneratedQuizParams):
+    difficulty: Difficulty  # obligatoria: es la que se guarda en el quiz
+    title: str
+    description: Optional[str] = None
+    passing_score: int = 70
+    time_limit: Optional[int] = None
+
+class QuizSummaryResponse(BaseModel):
+    quiz_id: int
+    quiz_title: str
+    category_id: int
+    best_score: int
+    best_percentage: float
+    attempts: int
+    passed: bool
+    first_passed_at: Optional[datetime] = None
+    last_attempt_at: datetime
+
+class WrongAnswerCount(BaseModel):
+    answer: str
+    count: int
+
+class QuestionAnalytics(BaseModel):
+    question_id: int
+    question_text: str
+    attempts: int
+    correct: int
+    correct_rate: Optional[float] = None
+    common_wrong_answers: list[WrongAnswerCount]
+
+class QuizAnalyticsResponse(BaseModel):
+    quiz_id: int
+    total_answers: int
+    questions: list[QuestionAnalytics]
+
 # ============================================
 # PROGRESS MODELS
 # ============================================
@@ -252,6 +351,52 @@ class UserProgressResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProgressEvent(BaseModel):
+    event_id: str = Field(..., min_length=1, max_length=64)
+    category_id: int
+    signs_learned: int = Field(1, ge=0)
+
+class ProgressEventBatch(BaseModel):
+    events: list[ProgressEvent] = Field(..., min_length=1, max_length=500)
+
+class ProgressEventsResponse(BaseModel):
+    accepted: int
+    duplicates: int
+
+class LearnedSignsRequest(BaseModel):
+    sign_ids: list[int] = Field(..., min_length=1, max_length=500)
+
+class LearnedSignsUpdate(BaseModel):
+    category_id: int
+    signs_learned: int
+    newly_learned: int
+
+class LearnedSignsResponse(BaseModel):
+    category_id: int
+    signs_learned: int
+    total_signs: int
+    sign_ids: list[int]
+
+# ============================================
+# REVIEW MODELS
+# ============================================
+
+class ReviewAnswer(BaseModel):
+    quality: int = Field(..., ge=0, le=5)  # 0 = no la recordó, 5 = respuesta perfecta
+
+class ReviewStateResponse(BaseModel):
+    sign_id: int
+    repetitions: int
+    interval_days: int
+    ease_factor: float
+    due_at: datetime
+    last_reviewed_at: Optional[datetime] = None
+
+class DueReviewResponse(BaseModel):
+    sign_id: int
+    due_at: datetime
+    sign: Optional[SignResponse] = None
+
 # ============================================
 # FAVORITES MODELS
 # ============================================
@@ -259,6 +404,17 @@ class UserProgressResponse(BaseModel):
 class FavoriteCreate(BaseModel):
     sign_id: int
 
+class FavoriteBulkRequest(BaseModel):
+    add: list[int] = Field(default_factory=list, max_length=500)
+    remove: list[int] = Field(default_factory=list, max_length=500)
+
+class FavoriteSetResponse(BaseModel):
+    user_id: int
+    sign_ids: list[int]
+    version: str
+    added: int
+    removed: int
+
 class FavoriteResponse(BaseModel):
     id: int
     user_id: int
@@ -280,7 +436,7 @@ class NewsBase(BaseModel):
     target_audience: TargetAudience = TargetAudience.all
 
 class NewsCreate(NewsBase):
-    pass
+    scheduled_at: Optional[datetime] = None
 
 class NewsUpdate(BaseModel):
     title: Optional[str] = None
@@ -289,11 +445,15 @@ class NewsUpdate(BaseModel):
     target_audience: Optional[TargetAudience] = None
     is_published: Optional[bool] = None
 
+class NewsSchedule(BaseModel):
+    scheduled_at: datetime
+
 class NewsResponse(NewsBase):
     id: int
     author_id: Optional[int] = None
     is_published: bool
     published_at: Optional[datetime] = None
+    scheduled_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
@@ -342,6 +502,19 @@ class MemoryGameScoreResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class MemoryGamePair(BaseModel):
+    sign_id: int
+    word: str
+    video_url: str
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+
+class MemoryGameDeckResponse(BaseModel):
+    level: int
+    category_id: Optional[int] = None
+    pair_count: int
+    pairs: list[MemoryGamePair]
+
 # ============================================
 # ACHIEVEMENT MODELS
 # ============================================
@@ -384,6 +557,32 @@ class AdminStatsResponse(BaseModel):
     average_user_score: float
     most_viewed_signs: list
     most_popular_category: Optional[str] = None
+    computed_at: Optional[datetime] = None
+
+class ActiveUsersResponse(BaseModel):
+    dau: int
+    wau: int
+    mau: int
+
+class ActiveUsersRangeResponse(BaseModel):
+    start_date: date
+    end_date: date
+    active_users: int
+
+class SessionMetricsBucket(BaseModel):
+    bucket_start: Optional[datetime] = None
+    session_count: int
+    total_duration: int
+    average_duration: float
+    p50_duration: Optional[float] = None
+    p95_duration: Optional[float] = None
+
+class SessionMetricsResponse(BaseModel):
+    start_date: date
+    end_date: date
+    granularity: RollupGranularity
+    total: SessionMetricsBucket
+    buckets: list[SessionMetricsBucket]
 
 # ============================================
 # SEARCH MODELS
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from app.models.schemas import LoginRequest, LoginResponse, UserResponse
 from app.database import get_db_connection
+from app.services import admin_stats, active_users
 from firebase_admin import auth
 import mysql.connector
 
@@ -34,6 +35,7 @@ def login_google(request: LoginRequest):
                 VALUES (%s, %s, %s, %s)
             """, (uid, email, name, picture))
             db.commit()
+            admin_stats.increment("total_users")
             
             cursor.execute("SELECT * FROM users WHERE firebase_uid = %s", (uid,))
             user = cursor.fetchone()
@@ -49,6 +51,8 @@ def login_google(request: LoginRequest):
         cursor.close()
         db.close()
         
+        active_users.record_activity(user['id'])
+        
         return LoginResponse(
             success=True,
             user=UserResponse(**user),
@@ -81,6 +85,8 @@ def get_current_user(id_token: str):
         if not user:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
+        active_users.record_activity(user['id'])
+        
         return UserResponse(**user)
         
     except auth.InvalidIdTokenError:
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from app.models.schemas import CategoryResponse, CategoryCreate, CategoryUpdate
 from app.database import get_db_connection
+from app.services import category_counts
 from typing import List, Optional
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
@@ -19,8 +20,7 @@ def get_categories(
         cursor = db.cursor(dictionary=True)
         
         query = """
-            SELECT c.*, 
-                   (SELECT COUNT(*) FROM signs s WHERE s.category_id = c.id AND s.is_active = TRUE) as total_signs
+            SELECT c.*
             FROM categories c
             WHERE c.is_active = %s
             ORDER BY c.order_index ASC
@@ -33,6 +33,10 @@ def get_categories(
         cursor.close()
         db.close()
         
+        counts = category_counts.get_all()
+        for cat in categories:
+            cat['total_signs'] = counts.get(cat['id'], 0)
+        
         return [CategoryResponse(**cat) for cat in categories]
         
     except Exception as e:
@@ -48,8 +52,7 @@ def get_category(category_id: int):
         cursor = db.cursor(dictionary=True)
         
         query = """
-            SELECT c.*, 
-                   (SELECT COUNT(*) FROM signs s WHERE s.category_id = c.id AND s.is_active = TRUE) as total_signs
+            SELECT c.*
             FROM categories c
             WHERE c.id = %s
         """
@@ -63,6 +66,8 @@ def get_category(category_id: int):
         if not category:
             raise HTTPException(status_code=404, detail="Categoría no encontrada")
         
+        category['total_signs'] = category_counts.get(category_id)
+        
         return CategoryResponse(**category)
         
     except HTTPException:
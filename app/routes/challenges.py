@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from app.models.schemas import DailyChallengeResponse
 from app.database import get_db_connection
-from datetime import datetime, date
+from app.services import challenge_scheduler
+from app.utils.dates import local_today
 from typing import List
 
 router = APIRouter(prefix="/challenges", tags=["Daily Challenges"])
@@ -10,31 +11,42 @@ router = APIRouter(prefix="/challenges", tags=["Daily Challenges"])
 def get_today_challenges(user_id: int):
     """
     Obtener retos diarios del día actual
+    
+    Las definiciones del día vienen de caché; solo se consulta el progreso
+    del usuario
     """
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
+        definitions = challenge_scheduler.get_challenges_for(local_today())
         
-        today = date.today()
+        if not definitions:
+            return []
         
-        query = """
-            SELECT 
-                c.*,
-                COALESCE(uc.progress, 0) as user_progress,
-                COALESCE(uc.completed, FALSE) as is_completed
-            FROM daily_challenges c
-            LEFT JOIN user_daily_challenges uc ON c.id = uc.challenge_id AND uc.user_id = %s
-            WHERE c.challenge_date = %s AND c.is_active = TRUE
-            ORDER BY c.id ASC
-        """
+        challenge_ids = [ch['id'] for ch in definitions]
+        placeholders = ", ".join(["%s"] * len(challenge_ids))
         
-        cursor.execute(query, (user_id, today))
-        challenges = cursor.fetchall()
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        
+        cursor.execute(f"""
+            SELECT challenge_id, progress, completed
+            FROM user_daily_challenges
+            WHERE user_id = %s AND challenge_id IN ({placeholders})
+        """, [user_id] + challenge_ids)
+        progress = {row['challenge_id']: row for row in cursor.fetchall()}
         
         cursor.close()
         db.close()
         
-        return [DailyChallengeResponse(**ch) for ch in challenges]
+        challenges = []
+        for definition in definitions:
+            user_challenge = progress.get(definition['id'])
+            challenges.append(DailyChallengeResponse(
+                **definition,
+                user_progress=user_challenge['progress'] if user_challenge else 0,
+                is_completed=bool(user_challenge['completed']) if user_challenge else False
+            ))
+        
+        return challenges
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -151,43 +163,16 @@ def update_challenge_progress(challenge_id: int, user_id: int, progress: int):
 def generate_today_challenges():
     """
     Generar retos diarios automáticos para hoy (solo admin)
+    
+    Los retos de los próximos días también se generan solos cada hora
     """
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        
-        today = date.today()
-        
-        # Verificar si ya existen retos para hoy
-        cursor.execute(
-            "SELECT COUNT(*) as count FROM daily_challenges WHERE challenge_date = %s",
-            (today,)
-        )
-        result = cursor.fetchone()
+        created = challenge_scheduler.generate_challenges(days_ahead=1)
         
-        if result['count'] > 0:
+        if created == 0:
             raise HTTPException(status_code=400, detail="Ya existen retos para hoy")
         
-        # Crear retos automáticos
-        challenges = [
-            ("Completa 3 quizzes", "Completa 3 quizzes de cualquier categoría", "quiz", 3, 50),
-            ("Practica 10 señas", "Mira 10 videos de señas diferentes", "practice", 10, 30),
-            ("Juega memoria", "Completa 1 partida del juego de memoria", "memory_game", 1, 25),
-            ("Mantén tu racha", "Ingresa a la app para mantener tu racha", "streak", 1, 20),
-        ]
-        
-        for title, description, challenge_type, target, points in challenges:
-            cursor.execute("""
-                INSERT INTO daily_challenges 
-                (title, description, challenge_type, target_value, reward_points, challenge_date)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (title, description, challenge_type, target, points, today))
-        
-        db.commit()
-        cursor.close()
-        db.close()
-        
-        return {"message": f"Se generaron {len(challenges)} retos para hoy"}
+        return {"message": f"Se generaron {created} retos para hoy"}
         
     except HTTPException:
         raise
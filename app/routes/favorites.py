@@ -1,55 +1,71 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import FavoriteCreate, FavoriteResponse, SignResponse
+from fastapi import APIRouter, HTTPException, Query
+from app.models.schemas import FavoriteCreate, FavoriteResponse, FavoriteBulkRequest, FavoriteSetResponse, SignResponse
 from app.database import get_db_connection
-from typing import List
+from app.services import favorites_cache, sign_cache
+from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter(prefix="/favorites", tags=["Favorites"])
 
 @router.get("/{user_id}", response_model=List[FavoriteResponse])
-def get_user_favorites(user_id: int):
+def get_user_favorites(
+    user_id: int,
+    before_created_at: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
     """
-    Obtener todas las señas favoritas de un usuario
+    Obtener las señas favoritas de un usuario, de la más reciente a la más antigua
+    
+    Para la siguiente página enviar `before_created_at` y `before_id` con los
+    valores del último favorito recibido
     """
     try:
         db = get_db_connection()
         cursor = db.cursor(dictionary=True)
         
         query = """
-            SELECT f.*, s.*
-            FROM user_favorites f
-            JOIN signs s ON f.sign_id = s.id
-            WHERE f.user_id = %s
-            ORDER BY f.created_at DESC
+            SELECT id, user_id, sign_id, created_at
+            FROM user_favorites
+            WHERE user_id = %s
         """
+        params = [user_id]
         
-        cursor.execute(query, (user_id,))
+        if before_created_at is not None and before_id is not None:
+            query += " AND (created_at < %s OR (created_at = %s AND id < %s))"
+            params.extend([before_created_at, before_created_at, before_id])
+        elif before_created_at is not None:
+            query += " AND created_at < %s"
+            params.append(before_created_at)
+        
+        query += " ORDER BY created_at DESC, id DESC LIMIT %s"
+        params.append(limit)
+        
+        cursor.execute(query, params)
         favorites = cursor.fetchall()
         
         cursor.close()
         db.close()
         
+        # Detalles de las señas desde la caché compartida
+        signs = {
+            sign['id']: sign
+            for sign in sign_cache.get_many(fav['sign_id'] for fav in favorites)
+        }
+        
         result = []
         for fav in favorites:
-            sign_data = {
-                'id': fav['sign_id'],
-                'category_id': fav['category_id'],
-                'word': fav['word'],
-                'description': fav['description'],
-                'video_url': fav['video_url'],
-                'thumbnail_url': fav['thumbnail_url'],
-                'image_url': fav['image_url'],
-                'difficulty': fav['difficulty'],
-                'is_active': fav['is_active'],
-                'views_count': fav['views_count'],
-                'created_at': fav['created_at'],
-                'is_favorite': True
-            }
+            sign = signs.get(fav['sign_id'])
+            if sign is None:
+                continue
+            
+            sign['is_favorite'] = True
             
             result.append(FavoriteResponse(
                 id=fav['id'],
                 user_id=fav['user_id'],
                 sign_id=fav['sign_id'],
-                sign=SignResponse(**sign_data),
+                sign=SignResponse(**sign),
                 created_at=fav['created_at']
             ))
         
@@ -86,9 +102,10 @@ def add_favorite(user_id: int, favorite: FavoriteCreate):
             "INSERT INTO user_favorites (user_id, sign_id) VALUES (%s, %s)",
             (user_id, favorite.sign_id)
         )
-        db.commit()
-        
         favorite_id = cursor.lastrowid
+        revision = favorites_cache.bump_revision(cursor, user_id)
+        db.commit()
+        favorites_cache.add(user_id, favorite.sign_id, revision)
         
         cursor.execute("SELECT * FROM user_favorites WHERE id = %s", (favorite_id,))
         new_favorite = cursor.fetchone()
@@ -111,6 +128,69 @@ def add_favorite(user_id: int, favorite: FavoriteCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{user_id}/bulk", response_model=FavoriteSetResponse)
+def bulk_update_favorites(user_id: int, changes: FavoriteBulkRequest):
+    """
+    Agregar y quitar varias señas de favoritos en una sola transacción
+    
+    Pensado para sincronizar cambios hechos sin conexión: es idempotente,
+    ignora señas inexistentes y si un ID viene en ambas listas se quita.
+    Retorna el conjunto resultante y su versión para que el cliente concilie.
+    """
+    to_remove = list(dict.fromkeys(changes.remove))
+    removing = set(to_remove)
+    to_add = [sign_id for sign_id in dict.fromkeys(changes.add) if sign_id not in removing]
+    
+    try:
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        
+        try:
+            added = 0
+            removed = 0
+            
+            if to_add:
+                placeholders = ", ".join(["%s"] * len(to_add))
+                cursor.execute(f"""
+                    INSERT IGNORE INTO user_favorites (user_id, sign_id)
+                    SELECT %s, id FROM signs WHERE id IN ({placeholders})
+                """, [user_id] + to_add)
+                added = cursor.rowcount
+            
+            if to_remove:
+                placeholders = ", ".join(["%s"] * len(to_remove))
+                cursor.execute(f"""
+                    DELETE FROM user_favorites
+                    WHERE user_id = %s AND sign_id IN ({placeholders})
+                """, [user_id] + to_remove)
+                removed = cursor.rowcount
+            
+            revision = favorites_cache.bump_revision(cursor, user_id)
+            
+            cursor.execute("SELECT sign_id FROM user_favorites WHERE user_id = %s", (user_id,))
+            sign_ids = [row['sign_id'] for row in cursor.fetchall()]
+            
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+            db.close()
+        
+        favorites = favorites_cache.replace(user_id, sign_ids, revision)
+        
+        return FavoriteSetResponse(
+            user_id=user_id,
+            sign_ids=list(favorites.ids),
+            version=favorites.version(),
+            added=added,
+            removed=removed
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{user_id}/{sign_id}")
 def remove_favorite(user_id: int, sign_id: int):
     """
@@ -131,7 +211,9 @@ def remove_favorite(user_id: int, sign_id: int):
             "DELETE FROM user_favorites WHERE user_id = %s AND sign_id = %s",
             (user_id, sign_id)
         )
+        revision = favorites_cache.bump_revision(cursor, user_id)
         db.commit()
+        favorites_cache.remove(user_id, sign_id, revision)
         
         cursor.close()
         db.close()
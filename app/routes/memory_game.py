@@ -1,10 +1,48 @@
 from fastapi import APIRouter, HTTPException, Query
-from app.models.schemas import MemoryGameScoreCreate, MemoryGameScoreResponse
+from app.models.schemas import MemoryGameScoreCreate, MemoryGameScoreResponse, MemoryGamePair, MemoryGameDeckResponse
 from app.database import get_db_connection
-from typing import List
+from app.services import events, memory_deck
+from typing import List, Optional
 
 router = APIRouter(prefix="/memory-game", tags=["Memory Game"])
 
+@router.get("/deck", response_model=MemoryGameDeckResponse)
+def get_game_deck(
+    level: int = Query(1, ge=1),
+    category_id: Optional[int] = None
+):
+    """
+    Obtener las parejas (video/imagen + palabra) para una partida
+    
+    El número de parejas y la dificultad de las señas dependen del nivel
+    """
+    try:
+        deck = memory_deck.build_deck(level, category_id)
+        
+        if len(deck) < 2:
+            raise HTTPException(status_code=404, detail="No hay suficientes señas para armar el juego")
+        
+        return MemoryGameDeckResponse(
+            level=level,
+            category_id=category_id,
+            pair_count=len(deck),
+            pairs=[
+                MemoryGamePair(
+                    sign_id=sign['id'],
+                    word=sign['word'],
+                    video_url=sign['video_url'],
+                    image_url=sign['image_url'],
+                    thumbnail_url=sign['thumbnail_url']
+                )
+                for sign in deck
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/scores", response_model=MemoryGameScoreResponse)
 def save_game_score(user_id: int, score: MemoryGameScoreCreate):
     """
@@ -46,6 +84,14 @@ def save_game_score(user_id: int, score: MemoryGameScoreCreate):
         cursor.close()
         db.close()
         
+        events.publish(
+            events.GAME_SCORE_SAVED,
+            user_id=user_id,
+            score_id=score_id,
+            score=score.score,
+            level=score.level
+        )
+        
         return MemoryGameScoreResponse(**new_score)
         
     except Exception as e:
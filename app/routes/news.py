@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, Query
-from app.models.schemas import NewsResponse, NewsCreate, NewsUpdate, TargetAudience
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from app.models.schemas import NewsResponse, NewsCreate, NewsUpdate, NewsSchedule, TargetAudience
 from app.database import get_db_connection
+from app.services import news_feed, news_publisher
 from typing import List, Optional
 
 router = APIRouter(prefix="/news", tags=["News"])
 
 @router.get("/", response_model=List[NewsResponse])
 def get_news(
+    request: Request,
+    response: Response,
     target_audience: Optional[TargetAudience] = None,
     is_published: Optional[bool] = True,
     skip: int = Query(0, ge=0),
@@ -14,8 +17,23 @@ def get_news(
 ):
     """
     Obtener noticias con filtros opcionales
+    
+    Las primeras páginas del feed publicado se sirven desde caché con un
+    ETag; si el cliente envía el mismo en If-None-Match se responde 304
     """
     try:
+        if is_published is True and skip + limit <= news_feed.FEED_CACHE_SIZE:
+            feed = news_feed.get_feed(target_audience.value if target_audience else None)
+            etag = feed.etag(skip, limit)
+            
+            if news_feed.matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "no-cache"
+            
+            return [NewsResponse(**news) for news in feed.page(skip, limit)]
+        
         db = get_db_connection()
         cursor = db.cursor(dictionary=True)
         
@@ -91,9 +109,13 @@ def create_news(news: NewsCreate, author_id: int):
             news.target_audience.value
         ))
         db.commit()
+        news_feed.invalidate()
         
         news_id = cursor.lastrowid
         
+        if news.scheduled_at is not None:
+            news_publisher.set_schedule(news_id, news.scheduled_at)
+        
         cursor.execute("SELECT * FROM news WHERE id = %s", (news_id,))
         new_news = cursor.fetchone()
         
@@ -138,12 +160,17 @@ def update_news(news_id: int, news: NewsUpdate):
             values.append(news.is_published)
             if news.is_published:
                 updates.append("published_at = CURRENT_TIMESTAMP")
+                updates.append("scheduled_at = NULL")
         
         if updates:
             values.append(news_id)
             query = f"UPDATE news SET {', '.join(updates)} WHERE id = %s"
             cursor.execute(query, values)
             db.commit()
+            news_feed.invalidate()
+            
+            if news.is_published:
+                news_publisher.cancel(news_id)
         
         cursor.execute("SELECT * FROM news WHERE id = %s", (news_id,))
         updated_news = cursor.fetchone()
@@ -173,6 +200,8 @@ def delete_news(news_id: int):
         
         cursor.execute("DELETE FROM news WHERE id = %s", (news_id,))
         db.commit()
+        news_feed.invalidate()
+        news_publisher.cancel(news_id)
         
         cursor.close()
         db.close()
@@ -199,10 +228,12 @@ def publish_news(news_id: int):
         
         cursor.execute("""
             UPDATE news 
-            SET is_published = TRUE, published_at = CURRENT_TIMESTAMP 
+            SET is_published = TRUE, published_at = CURRENT_TIMESTAMP, scheduled_at = NULL 
             WHERE id = %s
         """, (news_id,))
         db.commit()
+        news_feed.invalidate()
+        news_publisher.cancel(news_id)
         
         cursor.close()
         db.close()
@@ -229,6 +260,7 @@ def unpublish_news(news_id: int):
         
         cursor.execute("UPDATE news SET is_published = FALSE WHERE id = %s", (news_id,))
         db.commit()
+        news_feed.invalidate()
         
         cursor.close()
         db.close()
@@ -239,3 +271,60 @@ def unpublish_news(news_id: int):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{news_id}/schedule", response_model=NewsResponse)
+def schedule_news(news_id: int, schedule: NewsSchedule):
+    """
+    Programar la publicación de una noticia (solo admin)
+    
+    Si la hora ya pasó, la noticia se publica de inmediato
+    """
+    try:
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        
+        cursor.execute("SELECT * FROM news WHERE id = %s", (news_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Noticia no encontrada")
+        
+        if not news_publisher.set_schedule(news_id, schedule.scheduled_at):
+            raise HTTPException(status_code=400, detail="La noticia ya está publicada")
+        
+        cursor.execute("SELECT * FROM news WHERE id = %s", (news_id,))
+        scheduled_news = cursor.fetchone()
+        
+        cursor.close()
+        db.close()
+        
+        return NewsResponse(**scheduled_news)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{news_id}/schedule")
+def unschedule_news(news_id: int):
+    """
+    Cancelar la publicación programada de una noticia (solo admin)
+    """
+    try:
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        
+        cursor.execute("SELECT * FROM news WHERE id = %s", (news_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Noticia no encontrada")
+        
+        cursor.close()
+        db.close()
+        
+        if not news_publisher.set_schedule(news_id, None):
+            raise HTTPException(status_code=400, detail="La noticia ya está publicada")
+        
+        return {"message": "Publicación programada cancelada"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,27 @@
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import UserProgressResponse
+from app.models.schemas import (
+    UserProgressResponse,
+    ProgressEventBatch,
+    ProgressEventsResponse,
+    LearnedSignsRequest,
+    LearnedSignsUpdate,
+    LearnedSignsResponse
+)
 from app.database import get_db_connection
+from app.services import events, category_counts, progress_events, learned_signs
 from typing import List
 
 router = APIRouter(prefix="/progress", tags=["Progress"])
 
+def _with_current_total(progress: dict, total_signs: int) -> dict:
+    # El total y el porcentaje salen del conteo vigente de señas de la categoría,
+    # no del total guardado cuando se creó el progreso
+    progress['total_signs'] = total_signs
+    progress['progress_percentage'] = category_counts.progress_percentage(
+        progress['signs_learned'], total_signs
+    )
+    return progress
+
 @router.get("/{user_id}", response_model=List[UserProgressResponse])
 def get_user_progress(user_id: int):
     """
@@ -17,8 +34,7 @@ def get_user_progress(user_id: int):
         query = """
             SELECT 
                 up.*,
-                c.name as category_name,
-                ROUND((up.signs_learned / NULLIF(up.total_signs, 0)) * 100, 2) as progress_percentage
+                c.name as category_name
             FROM user_progress up
             JOIN categories c ON up.category_id = c.id
             WHERE up.user_id = %s
@@ -31,7 +47,12 @@ def get_user_progress(user_id: int):
         cursor.close()
         db.close()
         
-        return [UserProgressResponse(**p) for p in progress]
+        counts = category_counts.get_all()
+        
+        return [
+            UserProgressResponse(**_with_current_total(p, counts.get(p['category_id'], 0)))
+            for p in progress
+        ]
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -48,8 +69,7 @@ def get_category_progress(user_id: int, category_id: int):
         query = """
             SELECT 
                 up.*,
-                c.name as category_name,
-                ROUND((up.signs_learned / NULLIF(up.total_signs, 0)) * 100, 2) as progress_percentage
+                c.name as category_name
             FROM user_progress up
             JOIN categories c ON up.category_id = c.id
             WHERE up.user_id = %s AND up.category_id = %s
@@ -60,14 +80,10 @@ def get_category_progress(user_id: int, category_id: int):
         
         if not progress:
             # Crear progreso inicial si no existe
-            cursor.execute(
-                "SELECT COUNT(*) as total FROM signs WHERE category_id = %s AND is_active = TRUE",
-                (category_id,)
-            )
-            total_signs = cursor.fetchone()['total']
+            total_signs = category_counts.get(category_id)
             
             cursor.execute("""
-                INSERT INTO user_progress (user_id, category_id, total_signs)
+                INSERT IGNORE INTO user_progress (user_id, category_id, total_signs)
                 VALUES (%s, %s, %s)
             """, (user_id, category_id, total_signs))
             db.commit()
@@ -78,7 +94,7 @@ def get_category_progress(user_id: int, category_id: int):
         cursor.close()
         db.close()
         
-        return UserProgressResponse(**progress)
+        return UserProgressResponse(**_with_current_total(progress, category_counts.get(category_id)))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -92,37 +108,63 @@ def update_progress(user_id: int, category_id: int, signs_learned: int = 0):
         db = get_db_connection()
         cursor = db.cursor(dictionary=True)
         
-        # Verificar si existe progreso
-        cursor.execute(
-            "SELECT id FROM user_progress WHERE user_id = %s AND category_id = %s",
-            (user_id, category_id)
-        )
-        exists = cursor.fetchone()
-        
-        if exists:
-            cursor.execute("""
-                UPDATE user_progress 
-                SET signs_learned = signs_learned + %s,
-                    last_activity = CURRENT_TIMESTAMP
-                WHERE user_id = %s AND category_id = %s
-            """, (signs_learned, user_id, category_id))
-        else:
-            cursor.execute(
-                "SELECT COUNT(*) as total FROM signs WHERE category_id = %s AND is_active = TRUE",
-                (category_id,)
-            )
-            total_signs = cursor.fetchone()['total']
-            
-            cursor.execute("""
-                INSERT INTO user_progress (user_id, category_id, signs_learned, total_signs)
-                VALUES (%s, %s, %s, %s)
-            """, (user_id, category_id, signs_learned, total_signs))
+        progress_events.apply_delta(cursor, user_id, {category_id: signs_learned})
         
         db.commit()
         cursor.close()
         db.close()
         
+        events.publish(
+            events.PROGRESS_UPDATED,
+            user_id=user_id,
+            category_id=category_id,
+            signs_learned=signs_learned
+        )
+        
         return {"message": "Progreso actualizado exitosamente"}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{user_id}/events", response_model=ProgressEventsResponse)
+def ingest_progress_events(user_id: int, batch: ProgressEventBatch):
+    """
+    Registrar eventos de progreso generados en el cliente
+    
+    Cada evento lleva un `event_id` único; reenviar un lote tras un error de
+    red no vuelve a sumar los eventos que ya se aplicaron
+    """
+    try:
+        return ProgressEventsResponse(**progress_events.ingest(
+            user_id,
+            [event.model_dump() for event in batch.events]
+        ))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{user_id}/learned", response_model=List[LearnedSignsUpdate])
+def mark_signs_learned(user_id: int, request: LearnedSignsRequest):
+    """
+    Marcar varias señas como aprendidas
+    
+    Las señas ya marcadas no vuelven a contar; el avance de cada categoría
+    queda igual al número de señas activas aprendidas
+    """
+    try:
+        results = learned_signs.mark_learned(user_id, request.sign_ids)
+        return [LearnedSignsUpdate(**result) for result in results]
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{user_id}/{category_id}/learned", response_model=LearnedSignsResponse)
+def get_learned_signs(user_id: int, category_id: int):
+    """
+    Obtener las señas aprendidas por el usuario en una categoría
+    """
+    try:
+        return LearnedSignsResponse(**learned_signs.get_learned(user_id, category_id))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
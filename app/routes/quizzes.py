@@ -2,9 +2,14 @@ from fastapi import APIRouter, HTTPException, Query
 from app.models.schemas import (
     QuizResponse, QuizCreate, QuizUpdate,
     QuizQuestionResponse, QuizQuestionCreate,
-    QuizAttemptCreate, QuizAttemptResponse
+    QuizAttemptCreate, QuizAttemptResponse, AdaptiveQuizResponse,
+    QuizAnalyticsResponse, QuizSummaryResponse,
+    GeneratedQuizResponse, GeneratedQuizGrade, GeneratedQuizResult, GeneratedQuizSave,
+    Difficulty
 )
 from app.database import get_db_connection
+from app.services import admin_stats, events, adaptive_quiz, quiz_analytics, quiz_summaries, quiz_generator
+from datetime import datetime
 from typing import List, Optional
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
@@ -53,6 +58,128 @@ def get_quizzes(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ============================================
+# GENERATED QUIZZES
+# ============================================
+
+def _generate(category_id: int, count: int, difficulty: Optional[Difficulty], seed: Optional[int], version: Optional[str] = None) -> dict:
+    try:
+        quiz = quiz_generator.generate(category_id, count, difficulty.value if difficulty else None, seed)
+    except quiz_generator.NotEnoughSigns:
+        raise HTTPException(status_code=400, detail="La categoría no tiene suficientes señas para generar un quiz")
+    
+    if version is not None and version != quiz['version']:
+        raise HTTPException(status_code=409, detail="Las señas de la categoría cambiaron desde que se generó el quiz")
+    
+    return quiz
+
+@router.get("/generate", response_model=GeneratedQuizResponse)
+def generate_quiz(
+    category_id: int,
+    count: int = Query(10, ge=1, le=50),
+    difficulty: Optional[Difficulty] = None,
+    seed: Optional[int] = None
+):
+    """
+    Generar un quiz de opción múltiple con las señas de una categoría
+    
+    Con la misma semilla se obtiene el mismo quiz mientras las señas de la
+    categoría no cambien; se usa para calificarlo o guardarlo después
+    """
+    try:
+        return GeneratedQuizResponse(**_generate(category_id, count, difficulty, seed))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/generate/grade", response_model=GeneratedQuizResult)
+def grade_generated_quiz(attempt: GeneratedQuizGrade):
+    """
+    Calificar un quiz generado regenerándolo con su semilla
+    """
+    try:
+        quiz = _generate(attempt.category_id, attempt.count, attempt.difficulty, attempt.seed, attempt.version)
+        return GeneratedQuizResult(**quiz_generator.grade(quiz, attempt.answers))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/generate/save", response_model=QuizResponse)
+def save_generated_quiz(params: GeneratedQuizSave):
+    """
+    Guardar un quiz generado con todas sus preguntas (solo admin)
+    
+    Requiere `difficulty`, que es la que se guarda en el quiz; un quiz
+    generado sin ella mezcla señas de todas las dificultades
+    """
+    try:
+        quiz = _generate(params.category_id, params.count, params.difficulty, params.seed, params.version)
+        
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        
+        try:
+            cursor.execute("""
+                INSERT INTO quizzes (category_id, title, description, difficulty, passing_score, time_limit)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (
+                params.category_id,
+                params.title,
+                params.description,
+                params.difficulty.value,
+                params.passing_score,
+                params.time_limit
+            ))
+            quiz_id = cursor.lastrowid
+            
+            cursor.executemany("""
+                INSERT INTO quiz_questions 
+                (quiz_id, sign_id, question_text, question_type, question_video_url, 
+                 correct_answer, option_1, option_2, option_3, option_4, points, order_index)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [
+                (
+                    quiz_id,
+                    question['sign_id'],
+                    question['question_text'],
+                    question['question_type'],
+                    question['question_video_url'],
+                    question['correct_answer'],
+                    question['option_1'],
+                    question['option_2'],
+                    question['option_3'],
+                    question['option_4'],
+                    question['points'],
+                    question['index']
+                )
+                for question in quiz['questions']
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        cursor.execute("""
+            SELECT q.*,
+                   (SELECT COUNT(*) FROM quiz_questions qq WHERE qq.quiz_id = q.id) as total_questions
+            FROM quizzes q WHERE q.id = %s
+        """, (quiz_id,))
+        new_quiz = cursor.fetchone()
+        
+        cursor.close()
+        db.close()
+        
+        return QuizResponse(**new_quiz)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{quiz_id}", response_model=QuizResponse)
 def get_quiz(quiz_id: int):
     """
@@ -254,6 +381,36 @@ def get_quiz_questions(quiz_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{quiz_id}/questions/adaptive", response_model=AdaptiveQuizResponse)
+def get_adaptive_quiz_questions(
+    quiz_id: int,
+    user_id: Optional[int] = None,
+    count: int = Query(10, ge=1, le=50)
+):
+    """
+    Obtener un conjunto de preguntas del quiz según el nivel del usuario
+    
+    Con `user_id` la selección se guarda y se devuelve `session_id`; al enviar
+    el intento incluirlo en `adaptive_session` para que solo se califiquen esas
+    """
+    try:
+        questions = adaptive_quiz.select_questions(quiz_id, user_id, count)
+        
+        if not questions:
+            raise HTTPException(status_code=404, detail="Quiz no tiene preguntas")
+        
+        session_id = adaptive_quiz.create_session(user_id, quiz_id, questions) if user_id else None
+        
+        return AdaptiveQuizResponse(
+            session_id=session_id,
+            questions=[QuizQuestionResponse(**q) for q in questions]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/{quiz_id}/questions", response_model=QuizQuestionResponse)
 def create_quiz_question(quiz_id: int, question: QuizQuestionCreate):
     """
@@ -290,6 +447,7 @@ def create_quiz_question(quiz_id: int, question: QuizQuestionCreate):
             question.order_index
         ))
         db.commit()
+        adaptive_quiz.invalidate_quiz(quiz_id)
         
         question_id = cursor.lastrowid
         
@@ -324,6 +482,7 @@ def delete_quiz_question(quiz_id: int, question_id: int):
         
         cursor.execute("DELETE FROM quiz_questions WHERE id = %s", (question_id,))
         db.commit()
+        adaptive_quiz.invalidate_quiz(quiz_id)
         
         cursor.close()
         db.close()
@@ -335,6 +494,29 @@ def delete_quiz_question(quiz_id: int, question_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{quiz_id}/analytics", response_model=QuizAnalyticsResponse)
+def get_quiz_analytics(quiz_id: int):
+    """
+    Obtener tasa de acierto y respuestas incorrectas más comunes por pregunta (solo admin)
+    """
+    try:
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        
+        cursor.execute("SELECT id FROM quizzes WHERE id = %s", (quiz_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Quiz no encontrado")
+        
+        cursor.close()
+        db.close()
+        
+        return QuizAnalyticsResponse(**quiz_analytics.get_analytics(quiz_id))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ============================================
 # QUIZ ATTEMPTS
 # ============================================
@@ -350,11 +532,20 @@ def submit_quiz_attempt(quiz_id: int, user_id: int, attempt: QuizAttemptCreate):
         
         # Obtener preguntas del quiz
         cursor.execute(
-            "SELECT id, correct_answer, points FROM quiz_questions WHERE quiz_id = %s",
+            "SELECT id, sign_id, correct_answer, points FROM quiz_questions WHERE quiz_id = %s",
             (quiz_id,)
         )
         questions = cursor.fetchall()
         
+        # Con una sesión adaptativa se califican solo las preguntas que el
+        # servidor eligió para ella
+        if attempt.adaptive_session:
+            shown = adaptive_quiz.consume_session(cursor, attempt.adaptive_session, user_id, quiz_id)
+            if shown is None:
+                raise HTTPException(status_code=400, detail="Sesión adaptativa inválida o expirada")
+            shown = set(shown)
+            questions = [q for q in questions if q['id'] in shown]
+        
         if not questions:
             raise HTTPException(status_code=404, detail="Quiz no tiene preguntas")
         
@@ -362,12 +553,20 @@ def submit_quiz_attempt(quiz_id: int, user_id: int, attempt: QuizAttemptCreate):
         total_questions = len(questions)
         correct_answers = 0
         score = 0
+        answers = []
         
         for question in questions:
             user_answer = attempt.answers.get(str(question['id']))
-            if user_answer and user_answer.lower() == question['correct_answer'].lower():
+            correct = bool(user_answer) and user_answer.lower() == question['correct_answer'].lower()
+            if correct:
                 correct_answers += 1
                 score += question['points']
+            answers.append({
+                'question_id': question['id'],
+                'sign_id': question['sign_id'],
+                'answer': user_answer,
+                'correct': correct
+            })
         
         # Obtener passing_score del quiz
         cursor.execute("SELECT passing_score FROM quizzes WHERE id = %s", (quiz_id,))
@@ -393,9 +592,11 @@ def submit_quiz_attempt(quiz_id: int, user_id: int, attempt: QuizAttemptCreate):
             attempt.time_taken,
             passed
         ))
-        db.commit()
-        
+        # Leerlo antes de que record_attempt reutilice el cursor
         attempt_id = cursor.lastrowid
+        quiz_summaries.record_attempt(cursor, user_id, quiz_id, score, score_percentage, passed)
+        db.commit()
+        admin_stats.increment("total_quiz_attempts")
         
         # Actualizar progreso del usuario
         cursor.execute(
@@ -419,6 +620,18 @@ def submit_quiz_attempt(quiz_id: int, user_id: int, attempt: QuizAttemptCreate):
         cursor.close()
         db.close()
         
+        events.publish(
+            events.QUIZ_ATTEMPT_SAVED,
+            user_id=user_id,
+            quiz_id=quiz_id,
+            attempt_id=attempt_id,
+            category_id=category['category_id'],
+            score=score,
+            score_percentage=score_percentage,
+            passed=passed,
+            answers=answers
+        )
+        
         return QuizAttemptResponse(**new_attempt)
         
     except HTTPException:
@@ -426,10 +639,31 @@ def submit_quiz_attempt(quiz_id: int, user_id: int, attempt: QuizAttemptCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/summary/{user_id}", response_model=List[QuizSummaryResponse])
+def get_user_quiz_summaries(user_id: int):
+    """
+    Obtener el resumen del usuario en cada quiz: mejor puntaje, intentos y
+    si ya lo aprobó
+    """
+    try:
+        return [QuizSummaryResponse(**summary) for summary in quiz_summaries.get_summaries(user_id)]
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{quiz_id}/attempts/{user_id}", response_model=List[QuizAttemptResponse])
-def get_user_quiz_attempts(quiz_id: int, user_id: int):
+def get_user_quiz_attempts(
+    quiz_id: int,
+    user_id: int,
+    before_completed_at: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=100)
+):
     """
-    Obtener todos los intentos de un usuario en un quiz
+    Obtener los intentos de un usuario en un quiz, del más reciente al más antiguo
+    
+    Para la siguiente página enviar `before_completed_at` y `before_id` con los
+    valores del último intento recibido
     """
     try:
         db = get_db_connection()
@@ -438,10 +672,20 @@ def get_user_quiz_attempts(quiz_id: int, user_id: int):
         query = """
             SELECT * FROM user_quiz_attempts
             WHERE user_id = %s AND quiz_id = %s
-            ORDER BY completed_at DESC
         """
+        params = [user_id, quiz_id]
         
-        cursor.execute(query, (user_id, quiz_id))
+        if before_completed_at is not None and before_id is not None:
+            query += " AND (completed_at < %s OR (completed_at = %s AND id < %s))"
+            params.extend([before_completed_at, before_completed_at, before_id])
+        elif before_completed_at is not None:
+            query += " AND completed_at < %s"
+            params.append(before_completed_at)
+        
+        query += " ORDER BY completed_at DESC, id DESC LIMIT %s"
+        params.append(limit)
+        
+        cursor.execute(query, params)
         attempts = cursor.fetchall()
         
         cursor.close()
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.models.schemas import ReviewAnswer, ReviewStateResponse, DueReviewResponse, SignResponse
+from app.services import spaced_repetition, sign_cache
+from typing import List
+
+router = APIRouter(prefix="/review", tags=["Review"])
+
+@router.get("/{user_id}/due", response_model=List[DueReviewResponse])
+def get_due_reviews(user_id: int, limit: int = Query(20, ge=1, le=100)):
+    """
+    Obtener las siguientes señas que el usuario debe repasar
+    """
+    try:
+        due = spaced_repetition.due_reviews(user_id, limit)
+        
+        signs = {
+            sign['id']: sign
+            for sign in sign_cache.get_many([sign_id for sign_id, _ in due], user_id)
+        }
+        
+        return [
+            DueReviewResponse(
+                sign_id=sign_id,
+                due_at=due_at,
+                sign=SignResponse(**signs[sign_id]) if sign_id in signs else None
+            )
+            for sign_id, due_at in due
+        ]
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{user_id}/{sign_id}", response_model=ReviewStateResponse)
+def answer_review(user_id: int, sign_id: int, answer: ReviewAnswer):
+    """
+    Registrar el resultado de repasar una seña y programar el siguiente repaso
+    """
+    try:
+        review = spaced_repetition.record_reviews(user_id, {sign_id: answer.quality})[0]
+        return ReviewStateResponse(**review)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
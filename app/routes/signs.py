@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
-from app.models.schemas import SignResponse, SignCreate, SignUpdate, SearchRequest, SearchResponse, Difficulty
+from app.models.schemas import SignResponse, SignCreate, SignUpdate, SignBatchRequest, SearchRequest, SearchResponse, Difficulty
 from app.database import get_db_connection
+from app.services import events, sign_cache, favorites_cache, category_counts, learned_signs, sign_pools
 from typing import List, Optional
 
 router = APIRouter(prefix="/signs", tags=["Signs"])
@@ -10,6 +11,7 @@ def get_signs(
     category_id: Optional[int] = None,
     difficulty: Optional[Difficulty] = None,
     is_active: bool = True,
+    user_id: Optional[int] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100)
 ):
@@ -40,6 +42,8 @@ def get_signs(
         cursor.close()
         db.close()
         
+        favorites_cache.annotate(signs, user_id)
+        
         return [SignResponse(**sign) for sign in signs]
         
     except Exception as e:
@@ -65,19 +69,15 @@ def get_sign(sign_id: int, user_id: Optional[int] = None):
         if not sign:
             raise HTTPException(status_code=404, detail="Seña no encontrada")
         
-        # Verificar si es favorito del usuario
-        if user_id:
-            cursor.execute(
-                "SELECT id FROM user_favorites WHERE user_id = %s AND sign_id = %s",
-                (user_id, sign_id)
-            )
-            sign['is_favorite'] = cursor.fetchone() is not None
-        else:
-            sign['is_favorite'] = False
-        
         cursor.close()
         db.close()
         
+        # Verificar si es favorito del usuario
+        favorites_cache.annotate([sign], user_id)
+        
+        if user_id:
+            events.publish(events.SIGN_VIEWED, user_id=user_id, sign_id=sign_id)
+        
         return SignResponse(**sign)
         
     except HTTPException:
@@ -86,7 +86,7 @@ def get_sign(sign_id: int, user_id: Optional[int] = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/search", response_model=SearchResponse)
-def search_signs(search: SearchRequest):
+def search_signs(search: SearchRequest, user_id: Optional[int] = None):
     """
     Buscar señas por palabra o descripción
     """
@@ -117,6 +117,8 @@ def search_signs(search: SearchRequest):
         cursor.close()
         db.close()
         
+        favorites_cache.annotate(signs, user_id)
+        
         return SearchResponse(
             signs=[SignResponse(**sign) for sign in signs],
             total_results=len(signs)
@@ -125,6 +127,20 @@ def search_signs(search: SearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/batch", response_model=List[SignResponse])
+def get_signs_batch(batch: SignBatchRequest):
+    """
+    Obtener varias señas por ID en el orden pedido (sin contar vistas)
+    
+    Los IDs que no existen se omiten de la respuesta
+    """
+    try:
+        signs = sign_cache.get_many(batch.sign_ids, batch.user_id)
+        return [SignResponse(**sign) for sign in signs]
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/", response_model=SignResponse)
 def create_sign(sign: SignCreate):
     """
@@ -153,12 +169,18 @@ def create_sign(sign: SignCreate):
             sign.image_url,
             sign.difficulty.value
         ))
+        sign_id = cursor.lastrowid
+        
+        cursor.execute("SELECT * FROM signs WHERE id = %s", (sign_id,))
+        category_counts.sign_changed(cursor, None, cursor.fetchone())
         db.commit()
         
-        sign_id = cursor.lastrowid
+        # Posición de la seña en los conjuntos de aprendidas de su categoría
+        learned_signs.assign_ordinals()
         
         cursor.execute("SELECT * FROM signs WHERE id = %s", (sign_id,))
         new_sign = cursor.fetchone()
+        sign_pools.invalidate()
         new_sign['is_favorite'] = False
         
         cursor.close()
@@ -180,8 +202,9 @@ def update_sign(sign_id: int, sign: SignUpdate):
         db = get_db_connection()
         cursor = db.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM signs WHERE id = %s", (sign_id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT * FROM signs WHERE id = %s FOR UPDATE", (sign_id,))
+        current_sign = cursor.fetchone()
+        if not current_sign:
             raise HTTPException(status_code=404, detail="Seña no encontrada")
         
         updates = []
@@ -208,6 +231,8 @@ def update_sign(sign_id: int, sign: SignUpdate):
         if sign.category_id is not None:
             updates.append("category_id = %s")
             values.append(sign.category_id)
+            if sign.category_id != current_sign['category_id']:
+                updates.append("category_ordinal = NULL")
         if sign.is_active is not None:
             updates.append("is_active = %s")
             values.append(sign.is_active)
@@ -216,10 +241,18 @@ def update_sign(sign_id: int, sign: SignUpdate):
             values.append(sign_id)
             query = f"UPDATE signs SET {', '.join(updates)} WHERE id = %s"
             cursor.execute(query, values)
+            cursor.execute("SELECT * FROM signs WHERE id = %s", (sign_id,))
+            category_counts.sign_changed(cursor, current_sign, cursor.fetchone())
             db.commit()
+            sign_cache.invalidate(sign_id)
+            
+            if sign.category_id is not None and sign.category_id != current_sign['category_id']:
+                learned_signs.assign_ordinals()
+            learned_signs.invalidate_category(current_sign['category_id'])
         
         cursor.execute("SELECT * FROM signs WHERE id = %s", (sign_id,))
         updated_sign = cursor.fetchone()
+        sign_pools.invalidate()
         updated_sign['is_favorite'] = False
         
         cursor.close()
@@ -241,12 +274,17 @@ def delete_sign(sign_id: int):
         db = get_db_connection()
         cursor = db.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM signs WHERE id = %s", (sign_id,))
-        if not cursor.fetchone():
+        cursor.execute("SELECT * FROM signs WHERE id = %s FOR UPDATE", (sign_id,))
+        sign = cursor.fetchone()
+        if not sign:
             raise HTTPException(status_code=404, detail="Seña no encontrada")
         
         cursor.execute("DELETE FROM signs WHERE id = %s", (sign_id,))
+        category_counts.sign_changed(cursor, sign, None)
         db.commit()
+        sign_cache.invalidate(sign_id)
+        sign_pools.invalidate()
+        learned_signs.invalidate_category(sign['category_id'])
         
         cursor.close()
         db.close()
@@ -1,6 +1,13 @@
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import UserStatsResponse, AdminStatsResponse
+from app.models.schemas import (
+    UserStatsResponse, AdminStatsResponse,
+    ActiveUsersResponse, ActiveUsersRangeResponse,
+    SessionMetricsResponse, RollupGranularity
+)
 from app.database import get_db_connection
+from app.utils.dates import local_today
+from app.services import admin_stats, active_users, known_users, session_analytics
+from datetime import date, timedelta
 
 router = APIRouter(prefix="/statistics", tags=["Statistics"])
 
@@ -94,87 +101,73 @@ def get_user_statistics(user_id: int):
 def get_admin_statistics():
     """
     Obtener estadísticas generales de la aplicación (solo admin)
+    
+    Se sirven desde el snapshot que recalcula periódicamente el planificador
     """
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        
-        # Total de usuarios
-        cursor.execute("SELECT COUNT(*) as total FROM users")
-        total_users = cursor.fetchone()['total']
-        
-        # Usuarios activos (con última actividad en últimos 7 días)
-        cursor.execute("""
-            SELECT COUNT(DISTINCT user_id) as total
-            FROM user_progress
-            WHERE last_activity >= DATE_SUB(CURDATE(), INTERVAL 7 DAY)
-        """)
-        active_users = cursor.fetchone()['total']
-        
-        # Total de señas
-        cursor.execute("SELECT COUNT(*) as total FROM signs WHERE is_active = TRUE")
-        total_signs = cursor.fetchone()['total']
-        
-        # Total de categorías
-        cursor.execute("SELECT COUNT(*) as total FROM categories WHERE is_active = TRUE")
-        total_categories = cursor.fetchone()['total']
-        
-        # Total de quizzes
-        cursor.execute("SELECT COUNT(*) as total FROM quizzes WHERE is_active = TRUE")
-        total_quizzes = cursor.fetchone()['total']
-        
-        # Total de intentos de quizzes
-        cursor.execute("SELECT COUNT(*) as total FROM user_quiz_attempts")
-        total_attempts = cursor.fetchone()['total']
-        
-        # Promedio de puntuación
-        cursor.execute("""
-            SELECT AVG((correct_answers / total_questions) * 100) as avg_score
-            FROM user_quiz_attempts
-        """)
-        avg_score_result = cursor.fetchone()
-        avg_score = float(avg_score_result['avg_score'] or 0.0)
+        return AdminStatsResponse(**admin_stats.get_snapshot())
         
-        # Señas más vistas
-        cursor.execute("""
-            SELECT id, word, views_count
-            FROM signs
-            WHERE is_active = TRUE
-            ORDER BY views_count DESC
-            LIMIT 5
-        """)
-        most_viewed = cursor.fetchall()
-        
-        # Categoría más popular
-        cursor.execute("""
-            SELECT c.name, COUNT(up.id) as users_count
-            FROM categories c
-            LEFT JOIN user_progress up ON c.id = up.category_id
-            WHERE c.is_active = TRUE
-            GROUP BY c.id, c.name
-            ORDER BY users_count DESC
-            LIMIT 1
-        """)
-        popular_category = cursor.fetchone()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/admin/active-users", response_model=ActiveUsersResponse)
+def get_active_users():
+    """
+    Obtener usuarios activos diarios, semanales y mensuales (solo admin)
+    """
+    try:
+        today = local_today()
         
-        cursor.close()
-        db.close()
+        return ActiveUsersResponse(
+            dau=active_users.count_active_users(today, today),
+            wau=active_users.count_active_users(today - timedelta(days=6), today),
+            mau=active_users.count_active_users(today - timedelta(days=29), today)
+        )
         
-        return AdminStatsResponse(
-            total_users=total_users,
-            active_users=active_users,
-            total_signs=total_signs,
-            total_categories=total_categories,
-            total_quizzes=total_quizzes,
-            total_quiz_attempts=total_attempts,
-            average_user_score=round(avg_score, 2),
-            most_viewed_signs=most_viewed,
-            most_popular_category=popular_category['name'] if popular_category else None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/admin/active-users/range", response_model=ActiveUsersRangeResponse)
+def get_active_users_range(start_date: date, end_date: date):
+    """
+    Obtener usuarios activos distintos en un rango de fechas (solo admin)
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+    
+    if (end_date - start_date).days > 366:
+        raise HTTPException(status_code=400, detail="El rango máximo es de un año")
+    
+    try:
+        return ActiveUsersRangeResponse(
+            start_date=start_date,
+            end_date=end_date,
+            active_users=active_users.count_active_users(start_date, end_date)
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/admin/sessions", response_model=SessionMetricsResponse)
+def get_session_metrics(
+    start_date: date,
+    end_date: date,
+    granularity: RollupGranularity = RollupGranularity.day
+):
+    """
+    Obtener métricas de sesiones (cantidad, duración total, p50 y p95) desde
+    los rollups por hora o por día (solo admin)
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="La fecha final debe ser posterior a la inicial")
+    
+    try:
+        metrics = session_analytics.get_metrics(start_date, end_date, granularity.value)
+        return SessionMetricsResponse(**metrics)
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/leaderboard/points")
 def get_points_leaderboard(limit: int = 10):
     """
@@ -248,21 +241,20 @@ def get_streaks_leaderboard(limit: int = 10):
 def track_user_session(user_id: int, duration_seconds: int):
     """
     Registrar una sesión de usuario para estadísticas
+    
+    La sesión se guarda en lote junto con sus rollups por hora y por día
     """
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        
-        cursor.execute("""
-            INSERT INTO user_sessions (user_id, duration)
-            VALUES (%s, %s)
-        """, (user_id, duration_seconds))
-        db.commit()
+        # Se valida aquí porque la inserción ocurre después, fuera de la petición
+        if not known_users.exists(user_id):
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
-        cursor.close()
-        db.close()
+        session_analytics.record_session(user_id, duration_seconds)
+        active_users.record_activity(user_id)
         
         return {"message": "Sesión registrada exitosamente"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
-from app.models.schemas import UserResponse, UserUpdate
+from app.models.schemas import UserResponse, UserUpdate, StreakCalendarCompactResponse
 from app.database import get_db_connection
+from app.services import active_users, events, streaks, streak_calendar
 from typing import List
-from datetime import date
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -111,76 +111,29 @@ def update_user_streak(user_id: int):
     Actualizar racha del usuario (se llama cuando el usuario ingresa)
     """
     try:
-        db = get_db_connection()
-        cursor = db.cursor(dictionary=True)
-        
-        today = date.today()
-        
-        # Verificar actividad de hoy
-        cursor.execute("""
-            SELECT id FROM user_streaks
-            WHERE user_id = %s AND streak_date = %s
-        """, (user_id, today))
-        
-        today_activity = cursor.fetchone()
-        
-        if today_activity:
-            # Ya tiene actividad hoy, incrementar contador
-            cursor.execute("""
-                UPDATE user_streaks
-                SET activities_completed = activities_completed + 1
-                WHERE user_id = %s AND streak_date = %s
-            """, (user_id, today))
-        else:
-            # Crear registro de hoy
-            cursor.execute("""
-                INSERT INTO user_streaks (user_id, streak_date, activities_completed)
-                VALUES (%s, %s, 1)
-            """, (user_id, today))
-            
-            # Verificar si mantuvo la racha (actividad ayer)
-            cursor.execute("""
-                SELECT id FROM user_streaks
-                WHERE user_id = %s AND streak_date = DATE_SUB(%s, INTERVAL 1 DAY)
-            """, (user_id, today))
-            
-            yesterday_activity = cursor.fetchone()
-            
-            cursor.execute("SELECT current_streak, longest_streak FROM users WHERE id = %s", (user_id,))
-            user = cursor.fetchone()
-            
-            if yesterday_activity:
-                # Continúa la racha
-                new_streak = user['current_streak'] + 1
-                cursor.execute("""
-                    UPDATE users
-                    SET current_streak = %s,
-                        longest_streak = GREATEST(longest_streak, %s)
-                    WHERE id = %s
-                """, (new_streak, new_streak, user_id))
-            else:
-                # Se rompió la racha, reiniciar a 1
-                cursor.execute("""
-                    UPDATE users
-                    SET current_streak = 1
-                    WHERE id = %s
-                """, (user_id,))
+        streak = streaks.record_activity(user_id)
         
-        db.commit()
+        if streak is None:
+            raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
-        # Obtener racha actualizada
-        cursor.execute("SELECT current_streak, longest_streak FROM users WHERE id = %s", (user_id,))
-        updated_user = cursor.fetchone()
+        active_users.record_activity(user_id)
+        streak_calendar.record_activity(user_id)
         
-        cursor.close()
-        db.close()
+        events.publish(
+            events.STREAK_UPDATED,
+            user_id=user_id,
+            current_streak=streak['current_streak'],
+            longest_streak=streak['longest_streak']
+        )
         
         return {
             "message": "Racha actualizada",
-            "current_streak": updated_user['current_streak'],
-            "longest_streak": updated_user['longest_streak']
+            "current_streak": streak['current_streak'],
+            "longest_streak": streak['longest_streak']
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -216,6 +169,9 @@ def get_user_streak_calendar(user_id: int, days: int = 30):
     Obtener calendario de actividad del usuario
     """
     try:
+        if days < streak_calendar.WINDOW_DAYS:
+            return streak_calendar.active_days(user_id, days)
+        
         db = get_db_connection()
         cursor = db.cursor(dictionary=True)
         
@@ -239,3 +195,18 @@ def get_user_streak_calendar(user_id: int, days: int = 30):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{user_id}/streak-calendar/compact", response_model=StreakCalendarCompactResponse)
+def get_user_streak_calendar_compact(
+    user_id: int,
+    days: int = Query(365, ge=1, le=streak_calendar.WINDOW_DAYS)
+):
+    """
+    Obtener calendario de actividad compacto: bitmap de días activos en
+    base64 y actividades por día codificadas por tramos
+    """
+    try:
+        return StreakCalendarCompactResponse(**streak_calendar.compact(user_id, days))
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,6 +3,7 @@ from fastapi.responses import FileResponse
 from typing import List, Optional
 from app.models.schemas import VideoCreate, VideoUpdate, VideoResponse, VideoProgressCreate, VideoProgressUpdate, VideoProgressResponse
 from app.database import get_db
+from app.services import events
 from mysql.connector import Error
 import uuid
 import os
@@ -63,7 +64,7 @@ def get_videos(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.get("/{video_id}", response_model=VideoResponse)
-def get_video(video_id: int, db=Depends(get_db)):
+def get_video(video_id: int, user_id: Optional[int] = None, db=Depends(get_db)):
     """Obtener un video por ID e incrementar vistas"""
     try:
         cursor = db.cursor(dictionary=True)
@@ -86,6 +87,10 @@ def get_video(video_id: int, db=Depends(get_db)):
         video['views_count'] += 1
         
         cursor.close()
+        
+        if user_id:
+            events.publish(events.VIDEO_VIEWED, user_id=user_id, video_id=video_id)
+        
         return video
     
     except Error as e:
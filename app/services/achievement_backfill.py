@@ -0,0 +1,182 @@
+"""
+Desbloqueo masivo de logros para todos los usuarios.
+
+Uso desde la línea de comandos:
+
+    python -m app.services.achievement_backfill [--achievement-id ID ...] [--chunk-size N]
+"""
+import argparse
+import time
+from collections import defaultdict
+from typing import List, Optional
+
+from app.database import get_db_connection
+from app.services import achievement_engine
+
+# Una sola pasada agregada por tipo de logro: (user_id, valor)
+METRIC_QUERIES = {
+    "streak": "SELECT id as user_id, current_streak as value FROM users",
+    "progress": """
+        SELECT user_id, COALESCE(SUM(signs_learned), 0) as value
+        FROM user_progress
+        GROUP BY user_id
+    """,
+    "quiz": """
+        SELECT user_id, COUNT(*) as value
+        FROM user_quiz_attempts
+        GROUP BY user_id
+    """,
+}
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _pending_unlocks(cursor, achievement_ids: Optional[List[int]]):
+    query = """
+        SELECT id, achievement_type, requirement_value, points_reward
+        FROM achievements
+        WHERE is_active = TRUE
+    """
+    params = []
+    if achievement_ids:
+        query += f" AND id IN ({', '.join(['%s'] * len(achievement_ids))})"
+        params.extend(achievement_ids)
+
+    cursor.execute(query, params)
+    by_type = defaultdict(list)
+    for achievement in cursor.fetchall():
+        if achievement['achievement_type'] in METRIC_QUERIES:
+            by_type[achievement['achievement_type']].append(achievement)
+
+    pending = defaultdict(list)  # user_id -> [(achievement_id, points)]
+    evaluated_achievements = 0
+    evaluated_users = set()
+
+    for achievement_type, achievements in by_type.items():
+        evaluated_achievements += len(achievements)
+        ids = [a['id'] for a in achievements]
+
+        cursor.execute(
+            f"SELECT user_id, achievement_id FROM user_achievements WHERE achievement_id IN ({', '.join(['%s'] * len(ids))})",
+            ids
+        )
+        existing = {(row['user_id'], row['achievement_id']) for row in cursor.fetchall()}
+
+        cursor.execute(METRIC_QUERIES[achievement_type])
+        for row in cursor.fetchall():
+            user_id = row['user_id']
+            value = int(row['value'] or 0)
+            evaluated_users.add(user_id)
+            for achievement in achievements:
+                if value >= achievement['requirement_value'] and (user_id, achievement['id']) not in existing:
+                    pending[user_id].append((achievement['id'], achievement['points_reward']))
+
+    return pending, evaluated_achievements, len(evaluated_users)
+
+
+def _apply_chunk(db, cursor, chunk: dict):
+    """
+    Insertar los desbloqueos de un grupo de usuarios y acreditar sus puntos
+    """
+    user_ids = list(chunk)
+    achievement_ids = sorted({achievement_id for unlocks in chunk.values() for achievement_id, _ in unlocks})
+    user_placeholders = ", ".join(["%s"] * len(user_ids))
+    achievement_placeholders = ", ".join(["%s"] * len(achievement_ids))
+
+    # Bloquear a los usuarios y volver a revisar por si el motor de logros
+    # desbloqueó algo mientras tanto
+    cursor.execute(f"SELECT id FROM users WHERE id IN ({user_placeholders}) FOR UPDATE", user_ids)
+    cursor.execute(
+        f"""SELECT user_id, achievement_id FROM user_achievements
+            WHERE user_id IN ({user_placeholders}) AND achievement_id IN ({achievement_placeholders})""",
+        user_ids + achievement_ids
+    )
+    existing = {(row['user_id'], row['achievement_id']) for row in cursor.fetchall()}
+
+    rows = []
+    points = defaultdict(int)
+    for user_id, unlocks in chunk.items():
+        for achievement_id, reward in unlocks:
+            if (user_id, achievement_id) not in existing:
+                rows.append((user_id, achievement_id))
+                points[user_id] += reward
+
+    if rows:
+        cursor.executemany(
+            "INSERT INTO user_achievements (user_id, achievement_id) VALUES (%s, %s)",
+            rows
+        )
+        cursor.executemany(
+            "UPDATE users SET total_points = total_points + %s WHERE id = %s",
+            [(total, user_id) for user_id, total in points.items()]
+        )
+
+    db.commit()
+    return len(rows), sum(points.values())
+
+
+def backfill_achievements(achievement_ids: Optional[List[int]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Evaluar los logros activos para todos los usuarios y desbloquear los que
+    ya cumplen, en transacciones por grupos de usuarios
+    """
+    started = time.perf_counter()
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    unlocked = 0
+    points_awarded = 0
+    chunks = 0
+
+    try:
+        pending, evaluated_achievements, evaluated_users = _pending_unlocks(cursor, achievement_ids)
+        db.commit()
+
+        user_ids = list(pending)
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = {user_id: pending[user_id] for user_id in user_ids[start:start + chunk_size]}
+            try:
+                chunk_unlocked, chunk_points = _apply_chunk(db, cursor, chunk)
+            except Exception:
+                db.rollback()
+                raise
+            unlocked += chunk_unlocked
+            points_awarded += chunk_points
+            chunks += 1
+    finally:
+        cursor.close()
+        db.close()
+
+    # Los estados en memoria del motor ya no reflejan los desbloqueos
+    achievement_engine.invalidate_rules()
+    achievement_engine.clear_user_states()
+
+    elapsed = time.perf_counter() - started
+
+    return {
+        "achievements_evaluated": evaluated_achievements,
+        "users_evaluated": evaluated_users,
+        "unlocked": unlocked,
+        "points_awarded": points_awarded,
+        "chunks": chunks,
+        "elapsed_seconds": round(elapsed, 3),
+        "unlocks_per_second": round(unlocked / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Desbloquear logros pendientes para todos los usuarios")
+    parser.add_argument("--achievement-id", type=int, action="append", dest="achievement_ids",
+                        help="Limitar a estos logros (se puede repetir)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Usuarios por transacción")
+    args = parser.parse_args()
+
+    report = backfill_achievements(args.achievement_ids, args.chunk_size)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from app.database import get_db_connection
+from app.utils.cache import TTLCache
+
+CATALOG_TTL_SECONDS = 300
+UNLOCKED_TTL_SECONDS = 600
+MAX_CACHED_USERS = 20000
+
+_catalog_lock = threading.Lock()
+_catalog: Optional["Catalog"] = None
+_catalog_loaded_at: Optional[float] = None
+_catalog_version = 0
+
+_unlocked = TTLCache(maxsize=MAX_CACHED_USERS, ttl=UNLOCKED_TTL_SECONDS)
+
+
+class Catalog:
+    """
+    Catálogo de logros ordenado por puntos, con índice por ID
+    """
+
+    def __init__(self, rows: List[dict], version: int):
+        self.rows = rows
+        self.by_id = {row['id']: row for row in rows}
+        self.version = version
+
+    def active(self) -> List[dict]:
+        return [row for row in self.rows if row['is_active']]
+
+
+class UnlockedSet:
+    """
+    Logros desbloqueados de un usuario: un bit por ID de logro más la fecha
+    de desbloqueo de cada uno
+    """
+
+    def __init__(self, unlocked_at: Dict[int, datetime]):
+        self.bits = 0
+        self.unlocked_at = {}
+        for achievement_id, moment in unlocked_at.items():
+            self.add(achievement_id, moment)
+
+    def add(self, achievement_id: int, moment: datetime):
+        self.bits |= 1 << achievement_id
+        self.unlocked_at.setdefault(achievement_id, moment)
+
+    def has(self, achievement_id: int) -> bool:
+        return (self.bits >> achievement_id) & 1 == 1
+
+    def __len__(self):
+        return len(self.unlocked_at)
+
+
+def get_catalog() -> Catalog:
+    """
+    Obtener el catálogo de logros, recargándolo si expiró o fue invalidado
+    """
+    global _catalog, _catalog_loaded_at, _catalog_version
+
+    with _catalog_lock:
+        if _catalog is not None and time.monotonic() - _catalog_loaded_at < CATALOG_TTL_SECONDS:
+            return _catalog
+
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM achievements ORDER BY points_reward ASC, id ASC")
+        rows = cursor.fetchall()
+        cursor.close()
+        db.close()
+
+        _catalog_version += 1
+        _catalog = Catalog(rows, _catalog_version)
+        _catalog_loaded_at = time.monotonic()
+        return _catalog
+
+
+def invalidate_catalog():
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
+
+
+def get_unlocked(user_id: int) -> UnlockedSet:
+    """
+    Obtener los logros desbloqueados de un usuario (una consulta por índice
+    si no está en caché)
+    """
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute(
+            "SELECT achievement_id, unlocked_at FROM user_achievements WHERE user_id = %s",
+            (user_id,)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+        db.close()
+        return UnlockedSet({row['achievement_id']: row['unlocked_at'] for row in rows})
+
+    return _unlocked.get_or_load(user_id, load)
+
+
+def record_unlock(user_id: int, achievement_ids: Iterable[int], unlocked_at: Optional[datetime] = None):
+    """
+    Reflejar desbloqueos nuevos en la caché del usuario
+    """
+    unlocked = _unlocked.get(user_id)
+    if unlocked is None:
+        return
+    moment = unlocked_at or datetime.now().replace(microsecond=0)
+    for achievement_id in achievement_ids:
+        unlocked.add(achievement_id, moment)
+
+
+def invalidate_user(user_id: int):
+    _unlocked.pop(user_id)
+
+
+def clear_users():
+    _unlocked.clear()
+
+
+def _with_status(row: dict, unlocked: Optional[UnlockedSet]) -> dict:
+    achievement = dict(row)
+    is_unlocked = unlocked is not None and unlocked.has(row['id'])
+    achievement['is_unlocked'] = is_unlocked
+    achievement['unlocked_at'] = unlocked.unlocked_at[row['id']] if is_unlocked else None
+    return achievement
+
+
+def list_achievements(achievement_type: Optional[str] = None, is_active: bool = True) -> List[dict]:
+    rows = [
+        row for row in get_catalog().rows
+        if bool(row['is_active']) == is_active
+        and (achievement_type is None or row['achievement_type'] == achievement_type)
+    ]
+    return [_with_status(row, None) for row in rows]
+
+
+def user_achievements(user_id: int) -> List[dict]:
+    """
+    Logros activos con el estado del usuario, primero los desbloqueados
+    """
+    unlocked = get_unlocked(user_id)
+    achievements = [_with_status(row, unlocked) for row in get_catalog().active()]
+    # El catálogo ya viene ordenado por puntos; el orden estable lo conserva
+    achievements.sort(key=lambda a: not a['is_unlocked'])
+    return achievements
+
+
+def user_unlocked_achievements(user_id: int) -> List[dict]:
+    """
+    Solo los logros activos desbloqueados, del más reciente al más antiguo
+    """
+    unlocked = get_unlocked(user_id)
+    achievements = [
+        _with_status(row, unlocked)
+        for row in get_catalog().active()
+        if unlocked.has(row['id'])
+    ]
+    achievements.sort(key=lambda a: a['unlocked_at'] or datetime.min, reverse=True)
+    return achievements
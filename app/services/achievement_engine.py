@@ -0,0 +1,242 @@
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from app.database import get_db_connection
+from app.services import events, achievement_cache
+
+# Contador de usuario que evalúa cada tipo de logro
+COUNTER_BY_TYPE = {
+    "streak": "current_streak",
+    "progress": "signs_learned",
+    "quiz": "quizzes_completed",
+}
+
+# Consulta de un solo contador. Con varios workers cada uno ve solo sus
+# propios eventos, así que en cada evento se lee el valor real de la base
+COUNTER_QUERIES = {
+    "signs_learned": "SELECT COALESCE(SUM(signs_learned), 0) as value FROM user_progress WHERE user_id = %s",
+    "quizzes_completed": "SELECT COUNT(*) as value FROM user_quiz_attempts WHERE user_id = %s",
+    "games_played": "SELECT COUNT(*) as value FROM memory_game_scores WHERE user_id = %s",
+    "current_streak": "SELECT current_streak as value FROM users WHERE id = %s",
+}
+
+_rules_lock = threading.Lock()
+_rules: Dict[str, list] = {}
+_requirements: Dict[str, list] = {}
+_rules_version: Optional[int] = None
+
+# Candados repartidos por usuario para no crecer con la cantidad de usuarios
+_user_locks = [threading.Lock() for _ in range(64)]
+
+
+def invalidate_rules():
+    """
+    Forzar la recarga del catálogo y del índice de reglas
+    """
+    achievement_cache.invalidate_catalog()
+
+
+def clear_user_states():
+    """
+    Descartar los desbloqueos de usuario en memoria
+    """
+    achievement_cache.clear_users()
+
+
+def _load_rules():
+    global _rules, _requirements, _rules_version
+
+    catalog = achievement_cache.get_catalog()
+
+    with _rules_lock:
+        if _rules_version == catalog.version:
+            return
+
+        # Índice: contador -> reglas ordenadas por requisito
+        rules = defaultdict(list)
+        for achievement in catalog.active():
+            counter = COUNTER_BY_TYPE.get(achievement['achievement_type'])
+            if counter:
+                rules[counter].append((
+                    achievement['requirement_value'],
+                    achievement['id'],
+                    achievement['points_reward']
+                ))
+
+        for counter_rules in rules.values():
+            counter_rules.sort()
+
+        _rules = dict(rules)
+        _requirements = {counter: [rule[0] for rule in counter_rules] for counter, counter_rules in rules.items()}
+        _rules_version = catalog.version
+
+
+def _load_counters(user_id: int) -> Optional[dict]:
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT 
+            current_streak,
+            (SELECT COALESCE(SUM(signs_learned), 0) FROM user_progress WHERE user_id = %s) as signs_learned,
+            (SELECT COUNT(*) FROM user_quiz_attempts WHERE user_id = %s) as quizzes_completed,
+            (SELECT COUNT(*) FROM memory_game_scores WHERE user_id = %s) as games_played
+        FROM users
+        WHERE id = %s
+    """, (user_id, user_id, user_id, user_id))
+    stats = cursor.fetchone()
+
+    cursor.close()
+    db.close()
+
+    if not stats:
+        return None
+
+    return {name: int(value or 0) for name, value in stats.items()}
+
+
+def _load_counter(user_id: int, counter: str) -> int:
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(COUNTER_QUERIES[counter], (user_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    db.close()
+    return int(row['value'] or 0) if row else 0
+
+
+def _pending_rules(user_id: int, counters: dict, counter: str) -> list:
+    rules = _rules.get(counter, [])
+    reached = bisect_right(_requirements.get(counter, []), counters.get(counter, 0))
+    if not reached:
+        return []
+    unlocked = achievement_cache.get_unlocked(user_id)
+    return [rule for rule in rules[:reached] if not unlocked.has(rule[1])]
+
+
+def _unlock(user_id: int, rules: list) -> List[dict]:
+    """
+    Desbloquear varios logros en una sola transacción
+    """
+    achievement_ids = [rule[1] for rule in rules]
+    placeholders = ", ".join(["%s"] * len(achievement_ids))
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        # Serializar por usuario para no otorgar puntos dos veces entre workers
+        cursor.execute("SELECT id FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        cursor.execute(
+            f"SELECT achievement_id FROM user_achievements WHERE user_id = %s AND achievement_id IN ({placeholders})",
+            [user_id] + achievement_ids
+        )
+        already_unlocked = {row['achievement_id'] for row in cursor.fetchall()}
+        new_rules = [rule for rule in rules if rule[1] not in already_unlocked]
+
+        if new_rules:
+            values = ", ".join(["(%s, %s)"] * len(new_rules))
+            params = []
+            for _, achievement_id, _ in new_rules:
+                params.extend([user_id, achievement_id])
+            cursor.execute(f"INSERT INTO user_achievements (user_id, achievement_id) VALUES {values}", params)
+
+            cursor.execute("""
+                UPDATE users 
+                SET total_points = total_points + %s 
+                WHERE id = %s
+            """, (sum(rule[2] for rule in new_rules), user_id))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    if already_unlocked:
+        # Otro worker desbloqueó algo; recargar las fechas reales
+        achievement_cache.invalidate_user(user_id)
+    else:
+        achievement_cache.record_unlock(user_id, achievement_ids)
+
+    return [
+        {"achievement_id": achievement_id, "points_earned": points}
+        for _, achievement_id, points in new_rules
+    ]
+
+
+def _apply(user_id: int, counter: str, value: Optional[int] = None) -> List[dict]:
+    """
+    Evaluar solo las reglas que dependen de un contador del usuario.
+    Sin `value` el contador se lee de la base, que ya incluye la escritura
+    que originó el evento aunque otros workers hayan atendido las anteriores.
+    """
+    _load_rules()
+
+    if counter not in _rules:
+        return []
+
+    with _user_locks[user_id % len(_user_locks)]:
+        if value is None:
+            value = _load_counter(user_id, counter)
+
+        pending = _pending_rules(user_id, {counter: value}, counter)
+        if not pending:
+            return []
+
+        return _unlock(user_id, pending)
+
+
+def evaluate_user(user_id: int) -> Optional[List[dict]]:
+    """
+    Evaluar todas las reglas de un usuario con sus contadores actuales.
+    Retorna None si el usuario no existe.
+    """
+    _load_rules()
+
+    with _user_locks[user_id % len(_user_locks)]:
+        counters = _load_counters(user_id)
+        if counters is None:
+            return None
+
+        pending = []
+        for counter in _rules:
+            pending.extend(_pending_rules(user_id, counters, counter))
+
+        if not pending:
+            return []
+
+        return _unlock(user_id, pending)
+
+
+# ============================================
+# MANEJADORES DE EVENTOS
+# ============================================
+
+def on_quiz_attempt_saved(user_id: int, **_):
+    _apply(user_id, "quizzes_completed")
+
+
+def on_progress_updated(user_id: int, **_):
+    _apply(user_id, "signs_learned")
+
+
+def on_streak_updated(user_id: int, current_streak: int, **_):
+    _apply(user_id, "current_streak", value=current_streak)
+
+
+def on_game_score_saved(user_id: int, **_):
+    # Aún no hay tipos de logro para el juego de memoria; el contador se
+    # evalúa para que una regla nueva solo necesite su entrada en COUNTER_BY_TYPE
+    _apply(user_id, "games_played")
+
+
+def setup():
+    events.subscribe(events.QUIZ_ATTEMPT_SAVED, on_quiz_attempt_saved)
+    events.subscribe(events.PROGRESS_UPDATED, on_progress_updated)
+    events.subscribe(events.STREAK_UPDATED, on_streak_updated)
+    events.subscribe(events.GAME_SCORE_SAVED, on_game_score_saved)
@@ -0,0 +1,134 @@
+import threading
+from datetime import date, timedelta
+from typing import Dict
+
+from app.database import get_db_connection, ensure_schema
+from app.utils.dates import local_today
+from app.utils.hyperloglog import HyperLogLog
+from app.utils.scheduler import scheduler
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS active_user_sketches (
+        sketch_date DATE PRIMARY KEY,
+        registers BLOB NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+FLUSH_INTERVAL_SECONDS = 60
+
+# Días cerrados cuyo sketch ya no cambia; se guardan para no releer el BLOB
+MAX_CACHED_DAYS = 400
+
+_lock = threading.Lock()
+_pending: Dict[date, HyperLogLog] = {}
+_closed_days: Dict[date, HyperLogLog] = {}
+
+
+def record_activity(user_id: int, day: date = None):
+    """
+    Registrar que un usuario estuvo activo en un día
+    """
+    day = day or local_today()
+    with _lock:
+        sketch = _pending.get(day)
+        if sketch is None:
+            sketch = _pending[day] = HyperLogLog()
+        sketch.add(user_id)
+
+
+def flush():
+    """
+    Combinar los sketches pendientes de este worker con los guardados
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+
+    if not pending:
+        return
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        for day, sketch in pending.items():
+            cursor.execute(
+                "SELECT registers FROM active_user_sketches WHERE sketch_date = %s FOR UPDATE",
+                (day,)
+            )
+            stored = cursor.fetchone()
+            if stored:
+                sketch.merge(HyperLogLog.from_bytes(stored['registers']))
+
+            cursor.execute("""
+                INSERT INTO active_user_sketches (sketch_date, registers)
+                VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE registers = VALUES(registers)
+            """, (day, sketch.to_bytes()))
+            db.commit()
+    except Exception:
+        db.rollback()
+        # Devolver lo no guardado para el siguiente intento
+        with _lock:
+            for day, sketch in pending.items():
+                if day in _pending:
+                    _pending[day].merge(sketch)
+                else:
+                    _pending[day] = sketch
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+
+def count_active_users(start_date: date, end_date: date) -> int:
+    """
+    Contar usuarios activos distintos entre dos fechas (inclusive) combinando
+    los sketches diarios
+    """
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    closed_before = local_today() - timedelta(days=1)
+
+    merged = HyperLogLog()
+    missing = []
+
+    with _lock:
+        for day in days:
+            if day in _closed_days:
+                merged.merge(_closed_days[day])
+            else:
+                missing.append(day)
+            if day in _pending:
+                merged.merge(_pending[day])
+
+    if missing:
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+
+        placeholders = ", ".join(["%s"] * len(missing))
+        cursor.execute(
+            f"SELECT sketch_date, registers FROM active_user_sketches WHERE sketch_date IN ({placeholders})",
+            missing
+        )
+        stored = {row['sketch_date']: HyperLogLog.from_bytes(row['registers']) for row in cursor.fetchall()}
+
+        cursor.close()
+        db.close()
+
+        with _lock:
+            for day in missing:
+                sketch = stored.get(day)
+                if sketch is not None:
+                    merged.merge(sketch)
+                if day < closed_before and len(_closed_days) < MAX_CACHED_DAYS:
+                    _closed_days[day] = sketch or HyperLogLog()
+
+    return merged.count()
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    scheduler.every(FLUSH_INTERVAL_SECONDS, flush, name="active_users_flush", delay=FLUSH_INTERVAL_SECONDS)
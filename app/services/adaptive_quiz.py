@@ -0,0 +1,209 @@
+import random
+import secrets
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional
+
+from app.database import get_db_connection, ensure_schema
+from app.services import events
+from app.utils.cache import TTLCache
+
+# quiz_analytics.flush acumula las estadísticas por pregunta; aquí solo se leen
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS quiz_question_stats (
+        question_id INT PRIMARY KEY,
+        quiz_id INT NOT NULL,
+        attempts INT NOT NULL DEFAULT 0,
+        correct INT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        KEY idx_quiz_question_stats_quiz (quiz_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS adaptive_quiz_sessions (
+        id CHAR(32) PRIMARY KEY,
+        user_id INT NOT NULL,
+        quiz_id INT NOT NULL,
+        question_ids TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_adaptive_quiz_sessions_created (created_at)
+    )
+    """,
+]
+
+# Horas que una selección de preguntas sigue valiendo para enviar el intento
+SESSION_HOURS = 24
+
+# Qué tanto más difícil que su nivel se le pregunta al usuario
+STRETCH = 0.1
+
+# Cuántas preguntas candidatas por pregunta pedida se toman alrededor del objetivo
+WINDOW_FACTOR = 2
+
+
+def difficulty(attempts: int, correct: int) -> float:
+    """
+    Proporción estimada de respuestas incorrectas (0 = fácil, 1 = difícil).
+    El suavizado hace que una pregunta sin respuestas empiece en 0.5.
+    """
+    return 1 - (correct + 1) / (attempts + 2)
+
+
+class QuestionPool:
+    """
+    Preguntas de un quiz ordenadas por dificultad, con un arreglo paralelo de
+    dificultades para ubicar el nivel objetivo con búsqueda binaria
+    """
+
+    def __init__(self, questions: List[dict]):
+        questions.sort(key=lambda q: (q['difficulty'], q['order_index'], q['id']))
+        self.questions = questions
+        self.difficulties = array("d", (q['difficulty'] for q in questions))
+
+    def select(self, target: float, count: int, rng: random.Random) -> List[dict]:
+        """
+        Elegir al azar `count` preguntas entre las más cercanas al objetivo
+        """
+        total = len(self.questions)
+        if count >= total:
+            return list(self.questions)
+
+        window = min(count * WINDOW_FACTOR, total)
+        center = bisect_left(self.difficulties, target)
+        start = min(max(center - window // 2, 0), total - window)
+
+        chosen = rng.sample(range(start, start + window), count)
+        return [self.questions[index] for index in sorted(chosen)]
+
+
+_pools = TTLCache(maxsize=500, ttl=600)
+
+# user_id -> [respuestas correctas, respuestas totales]
+_accuracy = TTLCache(maxsize=50000, ttl=1800)
+
+
+def get_pool(quiz_id: int) -> QuestionPool:
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT qq.*, COALESCE(st.attempts, 0) as stat_attempts, COALESCE(st.correct, 0) as stat_correct
+            FROM quiz_questions qq
+            LEFT JOIN quiz_question_stats st ON st.question_id = qq.id
+            WHERE qq.quiz_id = %s
+        """, (quiz_id,))
+        questions = cursor.fetchall()
+        cursor.close()
+        db.close()
+
+        for question in questions:
+            question['difficulty'] = difficulty(question.pop('stat_attempts'), question.pop('stat_correct'))
+
+        return QuestionPool(questions)
+
+    return _pools.get_or_load(quiz_id, load)
+
+
+def invalidate_quiz(quiz_id: int):
+    _pools.pop(quiz_id)
+
+
+def get_accuracy(user_id: int) -> list:
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT COALESCE(SUM(correct_answers), 0) as correct,
+                   COALESCE(SUM(total_questions), 0) as total
+            FROM user_quiz_attempts
+            WHERE user_id = %s
+        """, (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        db.close()
+        return [int(row['correct']), int(row['total'])]
+
+    return _accuracy.get_or_load(user_id, load)
+
+
+def target_difficulty(user_id: Optional[int]) -> float:
+    """
+    Dificultad objetivo para el usuario: un poco por encima de su tasa de error
+    """
+    if not user_id:
+        return 0.5
+    correct, total = get_accuracy(user_id)
+    return min(max(difficulty(total, correct) + STRETCH, 0.0), 1.0)
+
+
+def select_questions(quiz_id: int, user_id: Optional[int], count: int) -> List[dict]:
+    """
+    Elegir un conjunto de preguntas del quiz adecuado al nivel del usuario,
+    ordenado de la más fácil a la más difícil
+    """
+    pool = get_pool(quiz_id)
+    return pool.select(target_difficulty(user_id), count, random.Random())
+
+
+def create_session(user_id: int, quiz_id: int, questions: List[dict]) -> str:
+    """
+    Guardar las preguntas elegidas para el usuario; el intento se califica
+    contra esta selección y no contra una lista enviada por el cliente
+    """
+    session_id = secrets.token_hex(16)
+
+    db = get_db_connection()
+    cursor = db.cursor()
+    try:
+        cursor.execute(
+            "DELETE FROM adaptive_quiz_sessions WHERE created_at < NOW() - INTERVAL %s HOUR",
+            (SESSION_HOURS,)
+        )
+        cursor.execute("""
+            INSERT INTO adaptive_quiz_sessions (id, user_id, quiz_id, question_ids)
+            VALUES (%s, %s, %s, %s)
+        """, (session_id, user_id, quiz_id, ",".join(str(q['id']) for q in questions)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    return session_id
+
+
+def consume_session(cursor, session_id: str, user_id: int, quiz_id: int) -> Optional[List[int]]:
+    """
+    Tomar las preguntas de una sesión vigente del usuario para ese quiz y
+    eliminarla en la misma transacción, así cada selección se califica una vez.
+    Devuelve None si la sesión no existe, expiró o es de otro usuario o quiz.
+    """
+    cursor.execute("""
+        SELECT question_ids FROM adaptive_quiz_sessions
+        WHERE id = %s AND user_id = %s AND quiz_id = %s
+        AND created_at >= NOW() - INTERVAL %s HOUR
+        FOR UPDATE
+    """, (session_id, user_id, quiz_id, SESSION_HOURS))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    cursor.execute("DELETE FROM adaptive_quiz_sessions WHERE id = %s", (session_id,))
+    return [int(question_id) for question_id in row['question_ids'].split(",")]
+
+
+def on_quiz_attempt_saved(user_id: int, answers: Iterable[dict] = (), **_):
+    # Las estadísticas por pregunta las guarda quiz_analytics en su lote
+    answers = list(answers)
+    accuracy = _accuracy.get(user_id)
+    if accuracy is not None:
+        accuracy[0] += sum(1 for answer in answers if answer['correct'])
+        accuracy[1] += len(answers)
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    events.subscribe(events.QUIZ_ATTEMPT_SAVED, on_quiz_attempt_saved)
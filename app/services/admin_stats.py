@@ -0,0 +1,168 @@
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.config import settings
+from app.database import get_db_connection, ensure_schema
+from app.services import active_users as active_users_service
+from app.utils.dates import local_today
+from app.utils.scheduler import scheduler
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS admin_stats_snapshots (
+        id TINYINT PRIMARY KEY,
+        payload JSON NOT NULL,
+        computed_at DATETIME NOT NULL
+    )
+    """,
+]
+
+# Contadores incrementales que se suman al snapshot entre recálculos
+COUNTERS = ("total_users", "total_quiz_attempts")
+
+_lock = threading.Lock()
+_snapshot: Optional[dict] = None
+_computed_at: Optional[datetime] = None
+_deltas = {name: 0 for name in COUNTERS}
+
+
+def compute_snapshot(cursor) -> dict:
+    """
+    Calcular las estadísticas generales con consultas agregadas completas
+    """
+    # Total de usuarios
+    cursor.execute("SELECT COUNT(*) as total FROM users")
+    total_users = cursor.fetchone()['total']
+
+    # Usuarios activos en los últimos 7 días (sketches diarios)
+    today = local_today()
+    active_users = active_users_service.count_active_users(today - timedelta(days=6), today)
+
+    # Total de señas
+    cursor.execute("SELECT COUNT(*) as total FROM signs WHERE is_active = TRUE")
+    total_signs = cursor.fetchone()['total']
+
+    # Total de categorías
+    cursor.execute("SELECT COUNT(*) as total FROM categories WHERE is_active = TRUE")
+    total_categories = cursor.fetchone()['total']
+
+    # Total de quizzes
+    cursor.execute("SELECT COUNT(*) as total FROM quizzes WHERE is_active = TRUE")
+    total_quizzes = cursor.fetchone()['total']
+
+    # Total de intentos de quizzes
+    cursor.execute("SELECT COUNT(*) as total FROM user_quiz_attempts")
+    total_attempts = cursor.fetchone()['total']
+
+    # Promedio de puntuación
+    cursor.execute("""
+        SELECT AVG((correct_answers / total_questions) * 100) as avg_score
+        FROM user_quiz_attempts
+    """)
+    avg_score_result = cursor.fetchone()
+    avg_score = float(avg_score_result['avg_score'] or 0.0)
+
+    # Señas más vistas
+    cursor.execute("""
+        SELECT id, word, views_count
+        FROM signs
+        WHERE is_active = TRUE
+        ORDER BY views_count DESC
+        LIMIT 5
+    """)
+    most_viewed = cursor.fetchall()
+
+    # Categoría más popular
+    cursor.execute("""
+        SELECT c.name, COUNT(up.id) as users_count
+        FROM categories c
+        LEFT JOIN user_progress up ON c.id = up.category_id
+        WHERE c.is_active = TRUE
+        GROUP BY c.id, c.name
+        ORDER BY users_count DESC
+        LIMIT 1
+    """)
+    popular_category = cursor.fetchone()
+
+    return {
+        "total_users": int(total_users),
+        "active_users": int(active_users),
+        "total_signs": int(total_signs),
+        "total_categories": int(total_categories),
+        "total_quizzes": int(total_quizzes),
+        "total_quiz_attempts": int(total_attempts),
+        "average_user_score": round(avg_score, 2),
+        "most_viewed_signs": most_viewed,
+        "most_popular_category": popular_category['name'] if popular_category else None
+    }
+
+
+def refresh():
+    """
+    Recalcular el snapshot, reutilizando el de otro worker si aún es reciente
+    """
+    global _snapshot, _computed_at
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute("SELECT payload, computed_at FROM admin_stats_snapshots WHERE id = 1")
+        stored = cursor.fetchone()
+
+        age = None
+        if stored:
+            age = (datetime.now() - stored['computed_at']).total_seconds()
+
+        if stored and age < settings.ADMIN_STATS_REFRESH_SECONDS:
+            snapshot = json.loads(stored['payload'])
+            computed_at = stored['computed_at']
+        else:
+            snapshot = compute_snapshot(cursor)
+            computed_at = datetime.now().replace(microsecond=0)
+            cursor.execute("""
+                INSERT INTO admin_stats_snapshots (id, payload, computed_at)
+                VALUES (1, %s, %s)
+                ON DUPLICATE KEY UPDATE payload = VALUES(payload), computed_at = VALUES(computed_at)
+            """, (json.dumps(snapshot, default=str), computed_at))
+            db.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+    with _lock:
+        _snapshot = snapshot
+        _computed_at = computed_at
+        for name in COUNTERS:
+            _deltas[name] = 0
+
+
+def increment(counter: str, amount: int = 1):
+    """
+    Sumar a un contador barato sin esperar al siguiente recálculo
+    """
+    with _lock:
+        _deltas[counter] += amount
+
+
+def get_snapshot() -> dict:
+    """
+    Obtener el último snapshot con los contadores incrementales aplicados
+    """
+    if _snapshot is None:
+        refresh()
+
+    with _lock:
+        snapshot = dict(_snapshot)
+        for name in COUNTERS:
+            snapshot[name] += _deltas[name]
+        snapshot['computed_at'] = _computed_at
+
+    return snapshot
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    scheduler.every(settings.ADMIN_STATS_REFRESH_SECONDS, refresh, name="admin_stats")
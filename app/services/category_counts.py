@@ -0,0 +1,101 @@
+from typing import Optional
+
+from app.database import get_db_connection, ensure_schema
+
+# Conteo materializado de señas activas por categoría. Se actualiza en la
+# misma transacción que crea, modifica o elimina la seña, así todos los
+# workers leen el mismo valor sin recorrer `signs`
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS category_sign_counts (
+        category_id INT PRIMARY KEY,
+        total INT NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+
+def get_all() -> dict:
+    """
+    Obtener el número de señas activas por categoría
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT category_id, total FROM category_sign_counts")
+    counts = {row['category_id']: int(row['total']) for row in cursor.fetchall()}
+    cursor.close()
+    db.close()
+    return counts
+
+
+def get(category_id: int) -> int:
+    """
+    Obtener el número de señas activas de una categoría
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("SELECT total FROM category_sign_counts WHERE category_id = %s", (category_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    db.close()
+    return int(row['total']) if row else 0
+
+
+def _adjust(cursor, category_id: Optional[int], delta: int):
+    if category_id is None or not delta:
+        return
+
+    cursor.execute("""
+        INSERT INTO category_sign_counts (category_id, total) VALUES (%s, GREATEST(%s, 0))
+        ON DUPLICATE KEY UPDATE total = GREATEST(total + %s, 0)
+    """, (category_id, delta, delta))
+
+
+def sign_changed(cursor, before: Optional[dict], after: Optional[dict]):
+    """
+    Reflejar el cambio de una seña comparando su fila antes y después
+    (None si no existía o ya no existe), dentro de la transacción del cambio
+    """
+    if before and before['is_active']:
+        _adjust(cursor, before['category_id'], -1)
+    if after and after['is_active']:
+        _adjust(cursor, after['category_id'], 1)
+
+
+def recount():
+    """
+    Recalcular todos los conteos desde `signs`
+    """
+    db = get_db_connection()
+    cursor = db.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO category_sign_counts (category_id, total)
+            SELECT c.id, COUNT(s.id)
+            FROM categories c
+            LEFT JOIN signs s ON s.category_id = c.id AND s.is_active = TRUE
+            GROUP BY c.id
+            ON DUPLICATE KEY UPDATE total = VALUES(total)
+        """)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+
+def progress_percentage(signs_learned: int, total: int) -> Optional[float]:
+    """
+    Porcentaje de avance con el total de señas vigente de la categoría
+    """
+    if not total:
+        return None
+    return round(signs_learned / total * 100, 2)
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    # Corrige cambios hechos fuera de la API
+    recount()
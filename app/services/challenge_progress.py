@@ -0,0 +1,236 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from app.database import get_db_connection, ensure_unique_key
+from app.services import events, challenge_scheduler, known_users
+from app.utils.cache import TTLCache
+from app.utils.dates import local_today
+from app.utils.scheduler import scheduler
+
+# Filas repetidas por (usuario, reto) que impedirían crear el índice único:
+# se conserva la de menor id con el mayor avance del grupo
+DEDUPE = [
+    """
+    UPDATE user_daily_challenges u
+    JOIN (
+        SELECT user_id, challenge_id, MIN(id) as keep_id,
+               MAX(progress) as progress, MAX(completed) as completed,
+               MIN(completed_at) as completed_at
+        FROM user_daily_challenges
+        GROUP BY user_id, challenge_id
+        HAVING COUNT(*) > 1
+    ) g ON u.id = g.keep_id
+    SET u.progress = g.progress, u.completed = g.completed, u.completed_at = g.completed_at
+    """,
+    """
+    DELETE u FROM user_daily_challenges u
+    JOIN user_daily_challenges k
+        ON k.user_id = u.user_id AND k.challenge_id = u.challenge_id AND k.id < u.id
+    """,
+]
+
+FLUSH_INTERVAL_SECONDS = 5
+
+# Intentos de guardar el avance de un usuario antes de descartarlo
+MAX_FLUSH_ATTEMPTS = 3
+
+_lock = threading.Lock()
+
+# (user_id, fecha, tipo de reto) -> {"delta": suma, "value": valor absoluto, "attempts": fallidos}
+_pending = {}
+
+# Señas y videos ya practicados hoy por usuario, para contar solo distintos
+_practiced = TTLCache(maxsize=50000, ttl=26 * 3600)
+
+
+def _merge(key, entry: dict):
+    merged = _pending.setdefault(key, {"delta": 0, "value": None, "attempts": 0})
+    merged["delta"] += entry["delta"]
+    if entry["value"] is not None:
+        merged["value"] = max(merged["value"] or 0, entry["value"])
+    merged["attempts"] = max(merged["attempts"], entry["attempts"])
+
+
+def _record(user_id: int, challenge_type: str, delta: int = 0, value: Optional[int] = None):
+    # Las vistas llegan con un user_id sin validar; uno inexistente haría
+    # fallar el lote de todos
+    if not known_users.exists(user_id):
+        return
+
+    key = (user_id, local_today(), challenge_type)
+    with _lock:
+        _merge(key, {"delta": delta, "value": value, "attempts": 0})
+
+
+def _record_practice(user_id: int, item):
+    key = (user_id, local_today())
+    with _lock:
+        seen = _practiced.get(key)
+        if seen is None:
+            seen = set()
+            _practiced.set(key, seen)
+        if item in seen:
+            return
+        seen.add(item)
+    _record(user_id, "practice", delta=1)
+
+
+def _apply(updates: list):
+    """
+    Guardar el avance de varios usuarios en una transacción y acreditar una
+    sola vez los retos que se completan
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        pairs = ", ".join(["(%s, %s)"] * len(updates))
+        params = []
+        for user_id, challenge, _, _ in updates:
+            params.extend([user_id, challenge['id']])
+
+        cursor.execute(f"""
+            SELECT user_id, challenge_id, progress, completed
+            FROM user_daily_challenges
+            WHERE (user_id, challenge_id) IN ({pairs})
+            FOR UPDATE
+        """, params)
+        current = {(row['user_id'], row['challenge_id']): row for row in cursor.fetchall()}
+
+        rows = []
+        rewards = defaultdict(int)
+        now = datetime.now().replace(microsecond=0)
+
+        for user_id, challenge, _, entry in updates:
+            existing = current.get((user_id, challenge['id']))
+            progress = existing['progress'] if existing else 0
+            was_completed = bool(existing['completed']) if existing else False
+
+            if entry["value"] is not None:
+                progress = max(progress, entry["value"])
+            progress += entry["delta"]
+
+            completed = progress >= challenge['target_value']
+            if completed and not was_completed:
+                rewards[user_id] += challenge['reward_points']
+
+            rows.append((
+                user_id,
+                challenge['id'],
+                progress,
+                completed,
+                now if completed and not was_completed else None
+            ))
+
+        cursor.executemany("""
+            INSERT INTO user_daily_challenges (user_id, challenge_id, progress, completed, completed_at)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                progress = VALUES(progress),
+                completed = VALUES(completed),
+                completed_at = COALESCE(completed_at, VALUES(completed_at))
+        """, rows)
+
+        if rewards:
+            cursor.executemany("""
+                UPDATE users 
+                SET total_points = total_points + %s 
+                WHERE id = %s
+            """, [(points, user_id) for user_id, points in rewards.items()])
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+
+def flush():
+    """
+    Aplicar el progreso acumulado con un upsert por lote. Si el lote falla se
+    reintenta por usuario, así una fila rechazada solo detiene a su usuario;
+    lo que sigue fallando vuelve a la cola hasta MAX_FLUSH_ATTEMPTS veces.
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+
+    if not pending:
+        return
+
+    # Resolver cada (fecha, tipo) al reto correspondiente
+    updates = []
+    for key, entry in pending.items():
+        user_id, day, challenge_type = key
+        for challenge in challenge_scheduler.get_challenges_for(day):
+            if challenge['challenge_type'] == challenge_type:
+                updates.append((user_id, challenge, key, entry))
+
+    if not updates:
+        return
+
+    try:
+        _apply(updates)
+        return
+    except Exception as e:
+        print(f"Error guardando avance de retos en lote, se reintenta por usuario: {e}")
+
+    by_user = defaultdict(list)
+    for update in updates:
+        by_user[update[0]].append(update)
+
+    for user_id, user_updates in by_user.items():
+        try:
+            _apply(user_updates)
+        except Exception as e:
+            failed = {key: entry for _, _, key, entry in user_updates}
+            attempts = max(entry["attempts"] for entry in failed.values()) + 1
+            if attempts >= MAX_FLUSH_ATTEMPTS:
+                print(f"Descartando avance de retos del usuario {user_id} tras {attempts} intentos: {e}")
+                continue
+            with _lock:
+                for key, entry in failed.items():
+                    _merge(key, dict(entry, attempts=attempts))
+
+
+# ============================================
+# MANEJADORES DE EVENTOS
+# ============================================
+
+def on_quiz_attempt_saved(user_id: int, **_):
+    _record(user_id, "quiz", delta=1)
+
+
+def on_sign_viewed(user_id: int, sign_id: int, **_):
+    _record_practice(user_id, ("sign", sign_id))
+
+
+def on_video_viewed(user_id: int, video_id: int, **_):
+    _record_practice(user_id, ("video", video_id))
+
+
+def on_game_score_saved(user_id: int, **_):
+    _record(user_id, "memory_game", delta=1)
+
+
+def on_streak_updated(user_id: int, current_streak: int, **_):
+    _record(user_id, "streak", value=current_streak)
+
+
+def setup():
+    ensure_unique_key(
+        "user_daily_challenges",
+        "uq_user_daily_challenges_user_challenge",
+        ["user_id", "challenge_id"],
+        dedupe=DEDUPE
+    )
+    events.subscribe(events.QUIZ_ATTEMPT_SAVED, on_quiz_attempt_saved)
+    events.subscribe(events.SIGN_VIEWED, on_sign_viewed)
+    events.subscribe(events.VIDEO_VIEWED, on_video_viewed)
+    events.subscribe(events.GAME_SCORE_SAVED, on_game_score_saved)
+    events.subscribe(events.STREAK_UPDATED, on_streak_updated)
+    scheduler.every(FLUSH_INTERVAL_SECONDS, flush, name="challenge_progress_flush", delay=FLUSH_INTERVAL_SECONDS)
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from app.config import settings
+from app.database import get_db_connection, ensure_unique_key
+from app.utils.cache import TTLCache
+from app.utils.dates import local_today
+from app.utils.scheduler import scheduler
+
+# Retos repetidos del mismo día y tipo que impedirían crear el índice único.
+# El progreso de los usuarios pasa al reto que se conserva (el de menor id);
+# si el usuario ya tenía progreso en ese, el repetido se descarta.
+DEDUPE = [
+    """
+    UPDATE IGNORE user_daily_challenges udc
+    JOIN daily_challenges d ON d.id = udc.challenge_id
+    JOIN (
+        SELECT challenge_date, challenge_type, MIN(id) as keep_id
+        FROM daily_challenges
+        GROUP BY challenge_date, challenge_type
+        HAVING COUNT(*) > 1
+    ) k ON k.challenge_date = d.challenge_date AND k.challenge_type = d.challenge_type
+    SET udc.challenge_id = k.keep_id
+    WHERE udc.challenge_id <> k.keep_id
+    """,
+    """
+    DELETE udc FROM user_daily_challenges udc
+    JOIN daily_challenges d ON d.id = udc.challenge_id
+    JOIN daily_challenges k
+        ON k.challenge_date = d.challenge_date
+        AND k.challenge_type = d.challenge_type
+        AND k.id < d.id
+    """,
+    """
+    DELETE d FROM daily_challenges d
+    JOIN daily_challenges k
+        ON k.challenge_date = d.challenge_date
+        AND k.challenge_type = d.challenge_type
+        AND k.id < d.id
+    """,
+]
+
+# Retos que se generan cada día: (título, descripción, tipo, meta, puntos)
+CHALLENGE_TEMPLATES = [
+    ("Completa 3 quizzes", "Completa 3 quizzes de cualquier categoría", "quiz", 3, 50),
+    ("Practica 10 señas", "Mira 10 videos de señas diferentes", "practice", 10, 30),
+    ("Juega memoria", "Completa 1 partida del juego de memoria", "memory_game", 1, 25),
+    ("Mantén tu racha", "Ingresa a la app para mantener tu racha", "streak", 1, 20),
+]
+
+GENERATION_INTERVAL_SECONDS = 3600
+
+# Definiciones de retos por fecha; la clave cambia sola a medianoche
+_challenges_by_date = TTLCache(maxsize=4, ttl=600)
+
+
+def generate_challenges(days_ahead: Optional[int] = None, start: Optional[date] = None) -> int:
+    """
+    Generar los retos de los próximos días. Es idempotente gracias al índice
+    único (fecha, tipo); retorna cuántos retos se crearon.
+    """
+    if days_ahead is None:
+        days_ahead = settings.CHALLENGE_DAYS_AHEAD
+    start = start or local_today()
+
+    rows = [
+        (title, description, challenge_type, target, points, start + timedelta(days=offset))
+        for offset in range(days_ahead)
+        for title, description, challenge_type, target, points in CHALLENGE_TEMPLATES
+    ]
+    if not rows:
+        return 0
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.executemany("""
+            INSERT IGNORE INTO daily_challenges 
+            (title, description, challenge_type, target_value, reward_points, challenge_date)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, rows)
+        created = cursor.rowcount
+        db.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+    if created:
+        _challenges_by_date.clear()
+
+    return max(created, 0)
+
+
+def get_challenges_for(day: date) -> List[dict]:
+    """
+    Obtener las definiciones de retos activos de un día
+    """
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT * FROM daily_challenges
+            WHERE challenge_date = %s AND is_active = TRUE
+            ORDER BY id ASC
+        """, (day,))
+        challenges = cursor.fetchall()
+        cursor.close()
+        db.close()
+        return challenges
+
+    return _challenges_by_date.get_or_load(day, load)
+
+
+def _generate_and_warm():
+    generate_challenges()
+    today = local_today()
+    get_challenges_for(today)
+    get_challenges_for(today + timedelta(days=1))
+
+
+def setup():
+    ensure_unique_key(
+        "daily_challenges",
+        "uq_daily_challenges_date_type",
+        ["challenge_date", "challenge_type"],
+        dedupe=DEDUPE
+    )
+    scheduler.every(GENERATION_INTERVAL_SECONDS, _generate_and_warm, name="challenge_generation")
@@ -0,0 +1,35 @@
+from collections import defaultdict
+from typing import Callable
+
+# Eventos de dominio publicados por las rutas después de confirmar la escritura
+QUIZ_ATTEMPT_SAVED = "quiz_attempt_saved"
+PROGRESS_UPDATED = "progress_updated"
+SIGNS_LEARNED = "signs_learned"
+STREAK_UPDATED = "streak_updated"
+GAME_SCORE_SAVED = "game_score_saved"
+SIGN_VIEWED = "sign_viewed"
+VIDEO_VIEWED = "video_viewed"
+
+_subscribers = defaultdict(list)
+
+
+def subscribe(event: str, handler: Callable):
+    """
+    Registrar un manejador para un evento
+    """
+    if handler not in _subscribers[event]:
+        _subscribers[event].append(handler)
+
+
+def publish(event: str, **payload):
+    """
+    Notificar un evento a sus manejadores.
+
+    Los errores de un manejador se registran y no afectan la petición que
+    publicó el evento.
+    """
+    for handler in list(_subscribers[event]):
+        try:
+            handler(**payload)
+        except Exception as e:
+            print(f"Error procesando evento '{event}' en {handler.__name__}: {e}")
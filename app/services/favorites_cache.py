@@ -0,0 +1,174 @@
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List
+
+from app.database import get_db_connection, ensure_schema, ensure_unique_key
+from app.utils.cache import TTLCache
+
+SCHEMA = [
+    """
+    ALTER TABLE user_favorites
+    ADD KEY idx_user_favorites_user_created (user_id, created_at, id)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_favorite_revisions (
+        user_id INT PRIMARY KEY,
+        revision BIGINT NOT NULL DEFAULT 0
+    )
+    """,
+]
+
+# Favoritos repetidos que impedirían crear el índice único: se conserva el más antiguo
+DEDUPE = [
+    """
+    DELETE f FROM user_favorites f
+    JOIN user_favorites k
+        ON k.user_id = f.user_id AND k.sign_id = f.sign_id AND k.id < f.id
+    """,
+]
+
+
+class FavoriteSet:
+    """
+    Ids de señas favoritas de un usuario en un arreglo ordenado de enteros
+    """
+
+    def __init__(self, sign_ids: Iterable[int] = ()):
+        self.ids = array("I", sorted(set(sign_ids)))
+
+    def __contains__(self, sign_id: int) -> bool:
+        index = bisect_left(self.ids, sign_id)
+        return index < len(self.ids) and self.ids[index] == sign_id
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, sign_id: int):
+        index = bisect_left(self.ids, sign_id)
+        if index == len(self.ids) or self.ids[index] != sign_id:
+            self.ids.insert(index, sign_id)
+
+    def remove(self, sign_id: int):
+        index = bisect_left(self.ids, sign_id)
+        if index < len(self.ids) and self.ids[index] == sign_id:
+            del self.ids[index]
+
+    def version(self) -> str:
+        """
+        Huella del contenido para que el cliente compare su copia local
+        """
+        return hashlib.sha1(self.ids.tobytes()).hexdigest()[:16]
+
+
+_lock = threading.Lock()
+
+# user_id -> [revisión, FavoriteSet]. Cada escritura incrementa la revisión
+# del usuario en la base dentro de su transacción; al leer se compara con
+# la guardada aquí, así ningún worker sirve favoritos que otro ya cambió
+_favorites = TTLCache(maxsize=10000, ttl=300)
+
+
+def _read_revision(cursor, user_id: int) -> int:
+    cursor.execute("SELECT revision FROM user_favorite_revisions WHERE user_id = %s", (user_id,))
+    row = cursor.fetchone()
+    return row['revision'] if row else 0
+
+
+def bump_revision(cursor, user_id: int) -> int:
+    """
+    Incrementar la revisión de favoritos del usuario dentro de la transacción
+    que los modifica y devolver la nueva
+    """
+    cursor.execute("""
+        INSERT INTO user_favorite_revisions (user_id, revision) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE revision = revision + 1
+    """, (user_id,))
+    return _read_revision(cursor, user_id)
+
+
+def get_favorites(user_id: int) -> FavoriteSet:
+    """
+    Obtener el conjunto de favoritos de un usuario; se recarga si su revisión
+    en la base cambió desde que se guardó en caché
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        # La revisión se lee antes que los favoritos: si cambia entre ambas
+        # lecturas, la siguiente consulta verá otra revisión y recargará
+        revision = _read_revision(cursor, user_id)
+        cached = _favorites.get(user_id)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+
+        cursor.execute("SELECT sign_id FROM user_favorites WHERE user_id = %s", (user_id,))
+        favorites = FavoriteSet(row["sign_id"] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+        db.close()
+
+    _favorites.set(user_id, [revision, favorites])
+    return favorites
+
+
+def _apply(user_id: int, revision: int, change):
+    with _lock:
+        cached = _favorites.get(user_id)
+        if cached is None:
+            return
+        if cached[0] == revision - 1:
+            change(cached[1])
+            cached[0] = revision
+        else:
+            # Hubo escrituras en otro worker que este no vio
+            _favorites.pop(user_id)
+
+
+def add(user_id: int, sign_id: int, revision: int):
+    """
+    Reflejar un favorito nuevo si el conjunto del usuario ya está en caché
+    """
+    _apply(user_id, revision, lambda favorites: favorites.add(sign_id))
+
+
+def remove(user_id: int, sign_id: int, revision: int):
+    """
+    Reflejar un favorito eliminado si el conjunto del usuario ya está en caché
+    """
+    _apply(user_id, revision, lambda favorites: favorites.remove(sign_id))
+
+
+def replace(user_id: int, sign_ids: Iterable[int], revision: int) -> FavoriteSet:
+    """
+    Guardar el conjunto completo recién leído de la base de datos
+    """
+    favorites = FavoriteSet(sign_ids)
+    _favorites.set(user_id, [revision, favorites])
+    return favorites
+
+
+def invalidate_user(user_id: int):
+    _favorites.pop(user_id)
+
+
+def annotate(signs: List[dict], user_id=None) -> List[dict]:
+    """
+    Marcar `is_favorite` en filas de señas para un usuario (None = ninguno)
+    """
+    favorites = get_favorites(user_id) if user_id else None
+    for sign in signs:
+        sign["is_favorite"] = favorites is not None and sign["id"] in favorites
+    return signs
+
+
+def setup():
+    ensure_unique_key(
+        "user_favorites",
+        "uq_user_favorites_user_sign",
+        ["user_id", "sign_id"],
+        dedupe=DEDUPE
+    )
+    ensure_schema(SCHEMA)
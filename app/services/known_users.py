@@ -0,0 +1,22 @@
+from app.database import get_db_connection
+from app.utils.cache import TTLCache
+
+# Solo se guardan los usuarios que existen; un id desconocido se consulta
+# de nuevo por si se registra después
+_known = TTLCache(maxsize=100000, ttl=3600)
+
+
+def exists(user_id: int) -> bool:
+    """
+    Verificar que el usuario existe antes de encolar escrituras en lote a su nombre
+    """
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor()
+        cursor.execute("SELECT 1 FROM users WHERE id = %s", (user_id,))
+        found = cursor.fetchone() is not None
+        cursor.close()
+        db.close()
+        return True if found else None
+
+    return bool(_known.get_or_load(user_id, load))
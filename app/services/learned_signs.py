@@ -0,0 +1,296 @@
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from app.database import get_db_connection, ensure_schema, ensure_unique_key
+from app.services import events, progress_events
+from app.utils.bitset import Bitset
+from app.utils.cache import TTLCache
+
+SCHEMA = [
+    "ALTER TABLE signs ADD COLUMN category_ordinal INT NULL",
+    """
+    CREATE TABLE IF NOT EXISTS category_ordinal_counters (
+        category_id INT PRIMARY KEY,
+        next_ordinal INT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_learned_signs (
+        user_id INT NOT NULL,
+        category_id INT NOT NULL,
+        bits BLOB NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, category_id)
+    )
+    """,
+]
+
+# Posiciones repetidas dentro de una categoría: se conserva la de la seña de
+# menor id y las demás quedan sin posición para que assign_ordinals les dé una nueva
+DEDUPE = [
+    """
+    UPDATE signs s
+    JOIN signs k
+        ON k.category_id = s.category_id AND k.category_ordinal = s.category_ordinal AND k.id < s.id
+    SET s.category_ordinal = NULL
+    """,
+]
+
+# category_id -> {ordinal: sign_id} de las señas activas
+_category_signs = TTLCache(maxsize=1000, ttl=300)
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def assign_ordinals():
+    """
+    Asignar a las señas sin posición la siguiente de su categoría.
+    La posición es el índice del bit de la seña en los conjuntos de aprendidas;
+    sale de un contador por categoría que solo avanza, así la posición de una
+    seña eliminada o movida nunca se reutiliza y ningún usuario hereda su bit.
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            SELECT id, category_id FROM signs
+            WHERE category_ordinal IS NULL
+            ORDER BY id ASC
+            FOR UPDATE
+        """)
+        pending = cursor.fetchall()
+
+        if pending:
+            category_ids = list(dict.fromkeys(sign['category_id'] for sign in pending))
+
+            # Categorías sin contador: se arranca después de la mayor posición existente
+            cursor.execute(f"""
+                INSERT IGNORE INTO category_ordinal_counters (category_id, next_ordinal)
+                SELECT c.id, COALESCE(MAX(s.category_ordinal) + 1, 0)
+                FROM categories c
+                LEFT JOIN signs s ON s.category_id = c.id
+                WHERE c.id IN ({_placeholders(category_ids)})
+                GROUP BY c.id
+            """, category_ids)
+
+            cursor.execute(f"""
+                SELECT category_id, next_ordinal FROM category_ordinal_counters
+                WHERE category_id IN ({_placeholders(category_ids)})
+                FOR UPDATE
+            """, category_ids)
+            next_ordinal = {row['category_id']: row['next_ordinal'] for row in cursor.fetchall()}
+
+            updates = []
+            for sign in pending:
+                ordinal = next_ordinal.get(sign['category_id'], 0)
+                next_ordinal[sign['category_id']] = ordinal + 1
+                updates.append((ordinal, sign['id']))
+
+            cursor.executemany("UPDATE signs SET category_ordinal = %s WHERE id = %s", updates)
+            cursor.executemany("""
+                INSERT INTO category_ordinal_counters (category_id, next_ordinal)
+                VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE next_ordinal = VALUES(next_ordinal)
+            """, list(next_ordinal.items()))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    if pending:
+        _category_signs.clear()
+
+
+def category_signs(category_id: int) -> dict:
+    """
+    Obtener {posición: sign_id} de las señas activas de una categoría
+    """
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT id, category_ordinal FROM signs
+            WHERE category_id = %s AND is_active = TRUE AND category_ordinal IS NOT NULL
+        """, (category_id,))
+        signs = {row['category_ordinal']: row['id'] for row in cursor.fetchall()}
+        cursor.close()
+        db.close()
+        return signs
+
+    return _category_signs.get_or_load(category_id, load)
+
+
+def _active_mask(category_id: int) -> Bitset:
+    return Bitset.from_positions(category_signs(category_id))
+
+
+def invalidate_category(category_id: Optional[int] = None):
+    """
+    Descartar las posiciones en caché tras crear, modificar o eliminar señas
+    """
+    if category_id is None:
+        _category_signs.clear()
+    else:
+        _category_signs.pop(category_id)
+
+
+def mark_learned(user_id: int, sign_ids: Iterable[int]) -> List[dict]:
+    """
+    Marcar varias señas como aprendidas por el usuario.
+
+    Solo las que no estaban marcadas cuentan como nuevas, así repetir la
+    petición no suma dos veces. `user_progress.signs_learned` es un contador
+    que solo recibe incrementos; aquí se le suman las nuevas, lo mismo que
+    se publica en PROGRESS_UPDATED.
+    """
+    sign_ids = list(dict.fromkeys(sign_ids))
+    if not sign_ids:
+        return []
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute(f"""
+            SELECT id, category_id, category_ordinal FROM signs
+            WHERE id IN ({_placeholders(sign_ids)})
+            AND is_active = TRUE AND category_ordinal IS NOT NULL
+        """, sign_ids)
+
+        by_category = defaultdict(list)
+        for sign in cursor.fetchall():
+            by_category[sign['category_id']].append(sign)
+
+        if not by_category:
+            db.commit()
+            return []
+
+        category_ids = list(by_category)
+        cursor.execute(f"""
+            SELECT category_id, bits FROM user_learned_signs
+            WHERE user_id = %s AND category_id IN ({_placeholders(category_ids)})
+            FOR UPDATE
+        """, [user_id] + category_ids)
+        learned = {row['category_id']: Bitset.from_bytes(row['bits']) for row in cursor.fetchall()}
+
+        results = []
+        newly_learned = {}
+        for category_id, signs in by_category.items():
+            bitset = learned.setdefault(category_id, Bitset())
+            new_ids = [sign['id'] for sign in signs if bitset.set(sign['category_ordinal'])]
+            newly_learned[category_id] = new_ids
+            results.append({
+                "category_id": category_id,
+                "signs_learned": bitset.count(_active_mask(category_id)),
+                "newly_learned": len(new_ids)
+            })
+
+        cursor.executemany("""
+            INSERT INTO user_learned_signs (user_id, category_id, bits)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE bits = VALUES(bits)
+        """, [(user_id, category_id, learned[category_id].to_bytes()) for category_id in category_ids])
+
+        deltas = {
+            category_id: len(new_ids)
+            for category_id, new_ids in newly_learned.items() if new_ids
+        }
+        if deltas:
+            progress_events.apply_delta(cursor, user_id, deltas)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    for result in results:
+        new_ids = newly_learned[result['category_id']]
+        if not new_ids:
+            continue
+        events.publish(
+            events.SIGNS_LEARNED,
+            user_id=user_id,
+            category_id=result['category_id'],
+            sign_ids=new_ids
+        )
+        events.publish(
+            events.PROGRESS_UPDATED,
+            user_id=user_id,
+            category_id=result['category_id'],
+            signs_learned=len(new_ids)
+        )
+
+    return results
+
+
+def get_learned(user_id: int, category_id: int) -> dict:
+    """
+    Obtener las señas activas que el usuario marcó como aprendidas en una categoría
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(
+        "SELECT bits FROM user_learned_signs WHERE user_id = %s AND category_id = %s",
+        (user_id, category_id)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    db.close()
+
+    bitset = Bitset.from_bytes(row['bits'] if row else None)
+    signs = category_signs(category_id)
+    sign_ids = sorted(signs[ordinal] for ordinal in bitset if ordinal in signs)
+
+    return {
+        "category_id": category_id,
+        "signs_learned": len(sign_ids),
+        "total_signs": len(signs),
+        "sign_ids": sign_ids
+    }
+
+
+def learned_among(user_id: int, sign_ids: Iterable[int]) -> set:
+    """
+    Filtrar las señas que el usuario tiene marcadas como aprendidas
+    """
+    sign_ids = list(dict.fromkeys(sign_ids))
+    if not sign_ids:
+        return set()
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT s.id, s.category_ordinal, l.bits
+        FROM signs s
+        JOIN user_learned_signs l ON l.user_id = %s AND l.category_id = s.category_id
+        WHERE s.id IN ({_placeholders(sign_ids)}) AND s.category_ordinal IS NOT NULL
+    """, [user_id] + sign_ids)
+    rows = cursor.fetchall()
+    cursor.close()
+    db.close()
+
+    return {
+        row['id'] for row in rows
+        if Bitset.from_bytes(row['bits']).test(row['category_ordinal'])
+    }
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    ensure_unique_key(
+        "signs",
+        "uq_signs_category_ordinal",
+        ["category_id", "category_ordinal"],
+        dedupe=DEDUPE
+    )
+    assign_ordinals()
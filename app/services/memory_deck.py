@@ -0,0 +1,53 @@
+import random
+from typing import List, Optional
+
+from app.services import sign_pools
+
+# Pares por nivel; los niveles mayores usan el último valor
+PAIRS_BY_LEVEL = (4, 6, 8, 10, 12)
+
+# Dificultades de las que se toman señas en cada nivel
+DIFFICULTIES_BY_LEVEL = (
+    ("easy",),
+    ("easy", "medium"),
+    ("easy", "medium", "hard"),
+)
+
+
+def pairs_for_level(level: int) -> int:
+    return PAIRS_BY_LEVEL[min(max(level, 1), len(PAIRS_BY_LEVEL)) - 1]
+
+
+def _candidates(pools: sign_pools.SignPools, category_id: Optional[int], difficulties) -> List[dict]:
+    if category_id is None:
+        return [sign for difficulty in difficulties for sign in pools.all_signs(difficulty)]
+    return [sign for difficulty in difficulties for sign in pools.signs(category_id, difficulty)]
+
+
+def build_deck(level: int, category_id: Optional[int] = None) -> List[dict]:
+    """
+    Elegir al azar las señas del tablero, sin palabras repetidas.
+
+    Se usan las dificultades del nivel y, si no alcanzan, el resto de las
+    señas de la categoría. Puede regresar menos pares si no hay suficientes.
+    """
+    pools = sign_pools.get_pools()
+    rng = random.Random()
+    pair_count = pairs_for_level(level)
+    allowed = DIFFICULTIES_BY_LEVEL[min(max(level, 1), len(DIFFICULTIES_BY_LEVEL)) - 1]
+
+    deck = []
+    words = set()
+
+    for difficulties in (allowed, sign_pools.DIFFICULTIES):
+        candidates = _candidates(pools, category_id, difficulties)
+        rng.shuffle(candidates)
+        for sign in candidates:
+            if sign['word'].lower() in words:
+                continue
+            deck.append(sign)
+            words.add(sign['word'].lower())
+            if len(deck) == pair_count:
+                return deck
+
+    return deck
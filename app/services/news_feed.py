@@ -0,0 +1,93 @@
+import hashlib
+import threading
+import time
+from typing import List, Optional
+
+from app.database import get_db_connection
+
+# Cantidad de noticias publicadas que se guardan por audiencia
+FEED_CACHE_SIZE = 100
+
+# Acota cuánto tarda un worker en ver cambios hechos en otro
+FEED_TTL_SECONDS = 60
+
+_lock = threading.Lock()
+_feeds = {}
+
+
+class Feed:
+    """
+    Primeras noticias publicadas de una audiencia y su versión
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+        self.loaded_at = time.monotonic()
+
+        # La versión depende solo del contenido, así coincide entre workers
+        digest = hashlib.sha1()
+        for row in rows:
+            digest.update(f"{row['id']}:{row['updated_at']}:{row['published_at']};".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+
+    def etag(self, skip: int, limit: int) -> str:
+        return f'W/"{self.version}-{skip}-{limit}"'
+
+    def page(self, skip: int, limit: int) -> List[dict]:
+        return self.rows[skip:skip + limit]
+
+
+def _load(target_audience: Optional[str]) -> Feed:
+    query = "SELECT * FROM news WHERE is_published = TRUE"
+    params = []
+
+    if target_audience:
+        query += " AND (target_audience = %s OR target_audience = 'all')"
+        params.append(target_audience)
+
+    query += " ORDER BY published_at DESC, created_at DESC LIMIT %s"
+    params.append(FEED_CACHE_SIZE)
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    db.close()
+
+    return Feed(rows)
+
+
+def get_feed(target_audience: Optional[str]) -> Feed:
+    """
+    Obtener el feed publicado de una audiencia (None = todas)
+    """
+    with _lock:
+        feed = _feeds.get(target_audience)
+        if feed is not None and time.monotonic() - feed.loaded_at < FEED_TTL_SECONDS:
+            return feed
+
+    feed = _load(target_audience)
+
+    with _lock:
+        _feeds[target_audience] = feed
+
+    return feed
+
+
+def invalidate():
+    """
+    Descartar los feeds en caché después de cualquier cambio en noticias
+    """
+    with _lock:
+        _feeds.clear()
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Verificar si el encabezado If-None-Match del cliente incluye el ETag
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
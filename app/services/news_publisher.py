@@ -0,0 +1,136 @@
+import threading
+from datetime import datetime
+from typing import Optional
+
+from app.database import get_db_connection, ensure_schema
+from app.services import news_feed
+from app.utils.dates import to_local_naive, from_local_naive
+from app.utils.scheduler import scheduler
+
+# scheduled_at se guarda en hora local de la aplicación (APP_TIMEZONE)
+SCHEMA = [
+    "ALTER TABLE news ADD COLUMN scheduled_at DATETIME NULL",
+    "ALTER TABLE news ADD KEY idx_news_scheduled (is_published, scheduled_at)",
+]
+
+_lock = threading.Lock()
+
+# news_id -> (tarea, hora programada)
+_jobs = {}
+
+
+def publish_scheduled(news_id: int, scheduled_at: datetime) -> bool:
+    """
+    Publicar una noticia programada. Solo aplica si sigue sin publicar y con
+    la misma hora programada, así los demás workers no la publican dos veces
+    ni publican una programación que ya cambió.
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            UPDATE news
+            SET is_published = TRUE, published_at = CURRENT_TIMESTAMP, scheduled_at = NULL
+            WHERE id = %s AND is_published = FALSE AND scheduled_at = %s
+        """, (news_id, scheduled_at))
+        published = cursor.rowcount == 1
+        db.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+    with _lock:
+        entry = _jobs.get(news_id)
+        if entry is not None and entry[1] == scheduled_at:
+            del _jobs[news_id]
+
+    if published:
+        news_feed.invalidate()
+
+    return published
+
+
+def schedule(news_id: int, scheduled_at: datetime):
+    """
+    Programar (o reprogramar) la publicación en este worker
+    """
+    scheduled_at = to_local_naive(scheduled_at)
+
+    job = scheduler.at(
+        from_local_naive(scheduled_at),
+        lambda: publish_scheduled(news_id, scheduled_at),
+        name=f"news_publish_{news_id}"
+    )
+
+    with _lock:
+        previous = _jobs.pop(news_id, None)
+        _jobs[news_id] = (job, scheduled_at)
+
+    if previous is not None:
+        previous[0].cancel()
+
+
+def cancel(news_id: int):
+    """
+    Cancelar la publicación programada de una noticia en este worker
+    """
+    with _lock:
+        entry = _jobs.pop(news_id, None)
+
+    if entry is not None:
+        entry[0].cancel()
+
+
+def set_schedule(news_id: int, scheduled_at: Optional[datetime]) -> bool:
+    """
+    Guardar la hora programada de una noticia sin publicar y registrar su
+    tarea; con None se quita la programación. Retorna False si la noticia ya
+    está publicada.
+    """
+    value = to_local_naive(scheduled_at) if scheduled_at is not None else None
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            UPDATE news SET scheduled_at = %s
+            WHERE id = %s AND is_published = FALSE
+        """, (value, news_id))
+        cursor.execute("SELECT is_published FROM news WHERE id = %s", (news_id,))
+        row = cursor.fetchone()
+        db.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+    if not row or row["is_published"]:
+        return False
+
+    if value is None:
+        cancel(news_id)
+    else:
+        schedule(news_id, value)
+
+    return True
+
+
+def _load_pending():
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT id, scheduled_at FROM news
+        WHERE is_published = FALSE AND scheduled_at IS NOT NULL
+    """)
+    pending = cursor.fetchall()
+    cursor.close()
+    db.close()
+
+    for row in pending:
+        schedule(row["id"], row["scheduled_at"])
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    _load_pending()
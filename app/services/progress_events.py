@@ -0,0 +1,151 @@
+from collections import defaultdict
+from typing import List
+
+from app.database import get_db_connection, ensure_schema, ensure_unique_key
+from app.services import events, category_counts
+from app.utils.cache import TTLCache
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS progress_events (
+        user_id INT NOT NULL,
+        event_id VARCHAR(64) NOT NULL,
+        category_id INT NOT NULL,
+        signs_learned INT NOT NULL DEFAULT 0,
+        received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, event_id)
+    )
+    """,
+]
+
+# Progreso repetido por (usuario, categoría), creado por el antiguo "consultar
+# y luego insertar", que impediría crear el índice único: los contadores se
+# suman en la fila de menor id y las demás se eliminan
+DEDUPE = [
+    """
+    UPDATE user_progress p
+    JOIN (
+        SELECT user_id, category_id, MIN(id) as keep_id,
+               SUM(signs_learned) as signs_learned,
+               MAX(total_signs) as total_signs,
+               SUM(quizzes_completed) as quizzes_completed,
+               COALESCE(SUM(average_score * quizzes_completed) / NULLIF(SUM(quizzes_completed), 0), 0) as average_score,
+               SUM(total_time_spent) as total_time_spent,
+               MAX(last_activity) as last_activity
+        FROM user_progress
+        GROUP BY user_id, category_id
+        HAVING COUNT(*) > 1
+    ) g ON p.id = g.keep_id
+    SET p.signs_learned = g.signs_learned,
+        p.total_signs = g.total_signs,
+        p.quizzes_completed = g.quizzes_completed,
+        p.average_score = g.average_score,
+        p.total_time_spent = g.total_time_spent,
+        p.last_activity = g.last_activity
+    """,
+    """
+    DELETE p FROM user_progress p
+    JOIN user_progress k
+        ON k.user_id = p.user_id AND k.category_id = p.category_id AND k.id < p.id
+    """,
+]
+
+# Eventos ya aplicados recientemente; la llave primaria de progress_events
+# cubre los que salieron de aquí o se aplicaron en otro worker
+_seen = TTLCache(maxsize=100000, ttl=24 * 3600)
+
+
+def apply_delta(cursor, user_id: int, deltas: dict):
+    """
+    Sumar señas aprendidas por categoría con un solo upsert
+    """
+    cursor.executemany("""
+        INSERT INTO user_progress (user_id, category_id, signs_learned, total_signs)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            signs_learned = signs_learned + VALUES(signs_learned),
+            last_activity = CURRENT_TIMESTAMP
+    """, [
+        (user_id, category_id, delta, category_counts.get(category_id))
+        for category_id, delta in deltas.items()
+    ])
+
+
+def ingest(user_id: int, progress_events: List[dict]) -> dict:
+    """
+    Aplicar un lote de eventos de progreso generados por el cliente.
+
+    Cada evento trae un `event_id` único por usuario; los reintentos con un id
+    ya aplicado se cuentan como duplicados y no suman de nuevo.
+    """
+    batch = {}
+    for event in progress_events:
+        key = (user_id, event['event_id'])
+        if key not in _seen and event['event_id'] not in batch:
+            batch[event['event_id']] = event
+
+    duplicates = len(progress_events) - len(batch)
+    if not batch:
+        return {"accepted": 0, "duplicates": duplicates}
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        event_ids = list(batch)
+        placeholders = ", ".join(["%s"] * len(event_ids))
+        cursor.execute(f"""
+            SELECT event_id FROM progress_events
+            WHERE user_id = %s AND event_id IN ({placeholders})
+            FOR UPDATE
+        """, [user_id] + event_ids)
+
+        for row in cursor.fetchall():
+            _seen.set((user_id, row['event_id']), True)
+            del batch[row['event_id']]
+            duplicates += 1
+
+        deltas = defaultdict(int)
+        for event in batch.values():
+            deltas[event['category_id']] += event['signs_learned']
+
+        if batch:
+            cursor.executemany("""
+                INSERT INTO progress_events (user_id, event_id, category_id, signs_learned)
+                VALUES (%s, %s, %s, %s)
+            """, [
+                (user_id, event['event_id'], event['category_id'], event['signs_learned'])
+                for event in batch.values()
+            ])
+            apply_delta(cursor, user_id, deltas)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    for event_id in batch:
+        _seen.set((user_id, event_id), True)
+
+    for category_id, delta in deltas.items():
+        events.publish(
+            events.PROGRESS_UPDATED,
+            user_id=user_id,
+            category_id=category_id,
+            signs_learned=delta
+        )
+
+    return {"accepted": len(batch), "duplicates": duplicates}
+
+
+def setup():
+    ensure_unique_key(
+        "user_progress",
+        "uq_user_progress_user_category",
+        ["user_id", "category_id"],
+        dedupe=DEDUPE
+    )
+    ensure_schema(SCHEMA)
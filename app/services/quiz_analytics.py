@@ -0,0 +1,187 @@
+import threading
+from collections import defaultdict
+from typing import Iterable
+
+from app.database import get_db_connection, ensure_schema
+from app.services import events
+from app.utils.scheduler import scheduler
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS quiz_answer_log (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        attempt_id INT NOT NULL,
+        quiz_id INT NOT NULL,
+        question_id INT NOT NULL,
+        user_id INT NOT NULL,
+        is_correct BOOLEAN NOT NULL,
+        answer VARCHAR(255) NULL,
+        answered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        KEY idx_quiz_answer_log_question (question_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quiz_wrong_answers (
+        question_id INT NOT NULL,
+        answer VARCHAR(255) NOT NULL,
+        quiz_id INT NOT NULL,
+        times INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (question_id, answer),
+        KEY idx_quiz_wrong_answers_quiz (quiz_id)
+    )
+    """,
+]
+
+FLUSH_INTERVAL_SECONDS = 5
+
+# Si el buffer crece más que esto se guarda dentro de la misma petición
+MAX_BUFFERED_ANSWERS = 5000
+
+# Respuestas incorrectas más comunes que se muestran por pregunta
+TOP_WRONG_ANSWERS = 3
+
+MAX_ANSWER_LENGTH = 255
+
+_lock = threading.Lock()
+_buffer = []
+
+
+def _normalize(answer) -> str:
+    return str(answer).strip().lower()[:MAX_ANSWER_LENGTH] if answer else None
+
+
+def record_answers(quiz_id: int, attempt_id: int, user_id: int, answers: Iterable[dict]):
+    """
+    Encolar las respuestas de un intento para guardarlas en el siguiente lote
+    """
+    rows = [
+        (attempt_id, quiz_id, answer['question_id'], user_id, answer['correct'], _normalize(answer['answer']))
+        for answer in answers
+    ]
+
+    with _lock:
+        _buffer.extend(rows)
+        should_flush = len(_buffer) >= MAX_BUFFERED_ANSWERS
+
+    if should_flush:
+        flush()
+
+
+def flush():
+    """
+    Insertar las respuestas en lote y actualizar los acumulados por pregunta
+    """
+    with _lock:
+        rows = list(_buffer)
+        _buffer.clear()
+
+    if not rows:
+        return
+
+    stats = defaultdict(lambda: [0, 0])
+    wrong = defaultdict(int)
+    quiz_of = {}
+
+    for _, quiz_id, question_id, _, is_correct, answer in rows:
+        quiz_of[question_id] = quiz_id
+        stats[question_id][0] += 1
+        if is_correct:
+            stats[question_id][1] += 1
+        elif answer:
+            wrong[(question_id, answer)] += 1
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.executemany("""
+            INSERT INTO quiz_answer_log (attempt_id, quiz_id, question_id, user_id, is_correct, answer)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, rows)
+
+        cursor.executemany("""
+            INSERT INTO quiz_question_stats (question_id, quiz_id, attempts, correct)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                attempts = attempts + VALUES(attempts),
+                correct = correct + VALUES(correct)
+        """, [
+            (question_id, quiz_of[question_id], attempts, correct)
+            for question_id, (attempts, correct) in stats.items()
+        ])
+
+        if wrong:
+            cursor.executemany("""
+                INSERT INTO quiz_wrong_answers (question_id, answer, quiz_id, times)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE times = times + VALUES(times)
+            """, [
+                (question_id, answer, quiz_of[question_id], times)
+                for (question_id, answer), times in wrong.items()
+            ])
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _lock:
+            _buffer[:0] = rows
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+
+def get_analytics(quiz_id: int) -> dict:
+    """
+    Obtener tasa de acierto y respuestas incorrectas más comunes por pregunta
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    cursor.execute("""
+        SELECT qq.id as question_id, qq.question_text,
+               COALESCE(st.attempts, 0) as attempts, COALESCE(st.correct, 0) as correct
+        FROM quiz_questions qq
+        LEFT JOIN quiz_question_stats st ON st.question_id = qq.id
+        WHERE qq.quiz_id = %s
+        ORDER BY qq.order_index ASC, qq.id ASC
+    """, (quiz_id,))
+    questions = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT question_id, answer, times
+        FROM quiz_wrong_answers
+        WHERE quiz_id = %s
+        ORDER BY question_id ASC, times DESC
+    """, (quiz_id,))
+    wrong = defaultdict(list)
+    for row in cursor.fetchall():
+        if len(wrong[row['question_id']]) < TOP_WRONG_ANSWERS:
+            wrong[row['question_id']].append({"answer": row['answer'], "count": row['times']})
+
+    cursor.close()
+    db.close()
+
+    for question in questions:
+        attempts = int(question['attempts'])
+        correct = int(question['correct'])
+        question['attempts'] = attempts
+        question['correct'] = correct
+        question['correct_rate'] = round(correct / attempts * 100, 2) if attempts else None
+        question['common_wrong_answers'] = wrong.get(question['question_id'], [])
+
+    return {
+        "quiz_id": quiz_id,
+        "total_answers": sum(question['attempts'] for question in questions),
+        "questions": questions
+    }
+
+
+def on_quiz_attempt_saved(user_id: int, quiz_id: int, attempt_id: int, answers: Iterable[dict] = (), **_):
+    record_answers(quiz_id, attempt_id, user_id, answers)
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    events.subscribe(events.QUIZ_ATTEMPT_SAVED, on_quiz_attempt_saved)
+    scheduler.every(FLUSH_INTERVAL_SECONDS, flush, name="quiz_answers_flush", delay=FLUSH_INTERVAL_SECONDS)
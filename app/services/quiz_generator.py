@@ -0,0 +1,134 @@
+import random
+from typing import Dict, List, Optional
+
+from app.services import sign_pools
+
+OPTIONS_PER_QUESTION = 4
+
+QUESTION_TEXT = "¿Qué seña se muestra en el video?"
+
+QUESTION_POINTS = 10
+
+# Dificultades a las que se recurre, en orden, si faltan distractores
+NEIGHBORS = {
+    "easy": ("easy", "medium", "hard"),
+    "medium": ("medium", "easy", "hard"),
+    "hard": ("hard", "medium", "easy"),
+}
+
+
+class NotEnoughSigns(Exception):
+    """
+    La categoría no tiene suficientes señas para generar el quiz
+    """
+
+
+def new_seed() -> int:
+    return random.SystemRandom().randrange(2 ** 31)
+
+
+def _distractors(pools: sign_pools.SignPools, category_id: int, sign: dict, rng: random.Random) -> List[str]:
+    """
+    Elegir palabras incorrectas de la misma categoría, primero de la misma
+    dificultad y luego de las más cercanas
+    """
+    words = []
+    taken = {sign['word'].lower()}
+
+    for difficulty in NEIGHBORS.get(sign['difficulty'], sign_pools.DIFFICULTIES):
+        candidates = [
+            candidate['word'] for candidate in pools.signs(category_id, difficulty)
+            if candidate['word'].lower() not in taken
+        ]
+        rng.shuffle(candidates)
+        for word in candidates:
+            if word.lower() in taken:
+                continue
+            words.append(word)
+            taken.add(word.lower())
+            if len(words) == OPTIONS_PER_QUESTION - 1:
+                return words
+
+    return words
+
+
+def generate(category_id: int, count: int, difficulty: Optional[str] = None, seed: Optional[int] = None) -> dict:
+    """
+    Generar un quiz de opción múltiple a partir de las señas de una categoría.
+
+    El resultado depende solo de los parámetros, la semilla y las señas de la
+    categoría (su `version`), así que se puede regenerar para calificar.
+    """
+    if seed is None:
+        seed = new_seed()
+
+    pools = sign_pools.get_pools()
+
+    candidates = pools.signs(category_id, difficulty)
+    if len({sign['word'].lower() for sign in pools.signs(category_id)}) < OPTIONS_PER_QUESTION or not candidates:
+        raise NotEnoughSigns()
+
+    # Con pocas señas salen menos preguntas; la semilla usa ese número para
+    # que regenerar con el `count` devuelto produzca el mismo quiz
+    count = min(count, len(candidates))
+    rng = random.Random(f"{seed}:{category_id}:{difficulty}:{count}")
+
+    questions = []
+    for index, sign in enumerate(rng.sample(candidates, count), start=1):
+        options = _distractors(pools, category_id, sign, rng) + [sign['word']]
+        rng.shuffle(options)
+
+        questions.append({
+            "index": index,
+            "sign_id": sign['id'],
+            "question_text": QUESTION_TEXT,
+            "question_type": "video_match",
+            "question_video_url": sign['video_url'],
+            "correct_answer": sign['word'],
+            "option_1": options[0],
+            "option_2": options[1],
+            "option_3": options[2],
+            "option_4": options[3],
+            "points": QUESTION_POINTS
+        })
+
+    return {
+        "category_id": category_id,
+        "difficulty": difficulty,
+        "count": count,
+        "seed": seed,
+        "version": pools.version(category_id),
+        "questions": questions
+    }
+
+
+def grade(quiz: dict, answers: Dict[int, str]) -> dict:
+    """
+    Calificar las respuestas ({índice: respuesta}) de un quiz regenerado
+    """
+    results = []
+    correct_answers = 0
+    score = 0
+
+    for question in quiz['questions']:
+        user_answer = answers.get(question['index'])
+        correct = bool(user_answer) and user_answer.lower() == question['correct_answer'].lower()
+        if correct:
+            correct_answers += 1
+            score += question['points']
+        results.append({
+            "index": question['index'],
+            "sign_id": question['sign_id'],
+            "correct": correct,
+            "correct_answer": question['correct_answer']
+        })
+
+    total_questions = len(quiz['questions'])
+
+    return {
+        "total_questions": total_questions,
+        "correct_answers": correct_answers,
+        "score": score,
+        "score_percentage": round(correct_answers / total_questions * 100, 2) if total_questions else 0.0,
+        "results": results
+    }
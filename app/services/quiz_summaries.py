@@ -0,0 +1,99 @@
+from typing import List
+
+from app.database import get_db_connection, ensure_schema
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS user_quiz_summaries (
+        user_id INT NOT NULL,
+        quiz_id INT NOT NULL,
+        best_score INT NOT NULL DEFAULT 0,
+        best_percentage FLOAT NOT NULL DEFAULT 0,
+        attempts INT NOT NULL DEFAULT 0,
+        passed BOOLEAN NOT NULL DEFAULT FALSE,
+        first_passed_at DATETIME NULL,
+        last_attempt_at DATETIME NOT NULL,
+        PRIMARY KEY (user_id, quiz_id)
+    )
+    """,
+    """
+    ALTER TABLE user_quiz_attempts
+    ADD KEY idx_user_quiz_attempts_history (user_id, quiz_id, completed_at, id)
+    """,
+]
+
+
+def record_attempt(cursor, user_id: int, quiz_id: int, score: int, score_percentage: float, passed: bool):
+    """
+    Actualizar el resumen del usuario en el quiz con un intento nuevo.
+    Se ejecuta con el cursor del intento para quedar en la misma transacción.
+    """
+    cursor.execute("""
+        INSERT INTO user_quiz_summaries
+        (user_id, quiz_id, best_score, best_percentage, attempts, passed, first_passed_at, last_attempt_at)
+        VALUES (%s, %s, %s, %s, 1, %s, IF(%s, CURRENT_TIMESTAMP, NULL), CURRENT_TIMESTAMP)
+        ON DUPLICATE KEY UPDATE
+            best_score = GREATEST(best_score, VALUES(best_score)),
+            best_percentage = GREATEST(best_percentage, VALUES(best_percentage)),
+            attempts = attempts + 1,
+            passed = passed OR VALUES(passed),
+            first_passed_at = COALESCE(first_passed_at, VALUES(first_passed_at)),
+            last_attempt_at = VALUES(last_attempt_at)
+    """, (user_id, quiz_id, score, score_percentage, passed, passed))
+
+
+def get_summaries(user_id: int) -> List[dict]:
+    """
+    Obtener el resumen del usuario en cada quiz que ha intentado
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT s.*, q.title as quiz_title, q.category_id
+        FROM user_quiz_summaries s
+        JOIN quizzes q ON q.id = s.quiz_id
+        WHERE s.user_id = %s
+        ORDER BY s.last_attempt_at DESC
+    """, (user_id,))
+    summaries = cursor.fetchall()
+    cursor.close()
+    db.close()
+    return summaries
+
+
+def backfill():
+    """
+    Llenar los resúmenes desde el historial de intentos si la tabla está vacía
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute("SELECT 1 FROM user_quiz_summaries LIMIT 1")
+        if cursor.fetchone():
+            return
+
+        cursor.execute("""
+            INSERT IGNORE INTO user_quiz_summaries
+            (user_id, quiz_id, best_score, best_percentage, attempts, passed, first_passed_at, last_attempt_at)
+            SELECT
+                user_id,
+                quiz_id,
+                MAX(score),
+                COALESCE(MAX(correct_answers / NULLIF(total_questions, 0) * 100), 0),
+                COUNT(*),
+                MAX(passed),
+                MIN(CASE WHEN passed THEN completed_at END),
+                MAX(completed_at)
+            FROM user_quiz_attempts
+            GROUP BY user_id, quiz_id
+        """)
+        db.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    backfill()
@@ -0,0 +1,226 @@
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from mysql.connector import DataError, IntegrityError
+
+from app.database import get_db_connection, ensure_schema
+from app.utils.scheduler import scheduler
+from app.utils.tdigest import TDigest
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS session_rollups_hourly (
+        bucket_start DATETIME PRIMARY KEY,
+        session_count INT NOT NULL DEFAULT 0,
+        total_duration BIGINT NOT NULL DEFAULT 0,
+        digest BLOB NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS session_rollups_daily (
+        bucket_start DATE PRIMARY KEY,
+        session_count INT NOT NULL DEFAULT 0,
+        total_duration BIGINT NOT NULL DEFAULT 0,
+        digest BLOB NOT NULL
+    )
+    """,
+]
+
+ROLLUP_TABLES = {
+    "hour": "session_rollups_hourly",
+    "day": "session_rollups_daily",
+}
+
+FLUSH_INTERVAL_SECONDS = 10
+
+# Si el buffer crece más que esto se guarda dentro de la misma petición
+MAX_BUFFERED_SESSIONS = 5000
+
+# Intentos de guardar una sesión antes de descartarla
+MAX_FLUSH_ATTEMPTS = 3
+
+_lock = threading.Lock()
+
+# (user_id, duración, momento, intentos fallidos)
+_buffer = []
+
+
+def record_session(user_id: int, duration: int):
+    """
+    Encolar una sesión para guardarla en el siguiente lote
+    """
+    with _lock:
+        _buffer.append((user_id, duration, datetime.now(), 0))
+        should_flush = len(_buffer) >= MAX_BUFFERED_SESSIONS
+
+    if should_flush:
+        flush()
+
+
+def _bucket_start(moment: datetime, granularity: str):
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.date()
+
+
+def _save(sessions: list):
+    """
+    Insertar las sesiones en lote y actualizar los rollups por hora y por día
+    """
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.executemany(
+            "INSERT INTO user_sessions (user_id, duration) VALUES (%s, %s)",
+            [(user_id, duration) for user_id, duration, _, _ in sessions]
+        )
+
+        for granularity, table in ROLLUP_TABLES.items():
+            buckets = defaultdict(TDigest)
+            counts = defaultdict(int)
+            totals = defaultdict(int)
+            for _, duration, moment, _ in sessions:
+                bucket = _bucket_start(moment, granularity)
+                buckets[bucket].add(duration)
+                counts[bucket] += 1
+                totals[bucket] += duration
+
+            for bucket, digest in buckets.items():
+                cursor.execute(
+                    f"SELECT digest FROM {table} WHERE bucket_start = %s FOR UPDATE",
+                    (bucket,)
+                )
+                stored = cursor.fetchone()
+                if stored:
+                    digest.merge(TDigest.from_bytes(stored['digest']))
+
+                cursor.execute(f"""
+                    INSERT INTO {table} (bucket_start, session_count, total_duration, digest)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        session_count = session_count + VALUES(session_count),
+                        total_duration = total_duration + VALUES(total_duration),
+                        digest = VALUES(digest)
+                """, (bucket, counts[bucket], totals[bucket], digest.to_bytes()))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+
+def flush():
+    """
+    Guardar las sesiones acumuladas. Si el lote falla se reintenta sesión por
+    sesión, así una fila rechazada no detiene a las demás; las que siguen
+    fallando vuelven al buffer hasta MAX_FLUSH_ATTEMPTS veces.
+    """
+    with _lock:
+        sessions = list(_buffer)
+        _buffer.clear()
+
+    if not sessions:
+        return
+
+    try:
+        _save(sessions)
+        return
+    except Exception as e:
+        print(f"Error guardando sesiones en lote, se reintenta una por una: {e}")
+
+    retry = []
+    for index, session in enumerate(sessions):
+        try:
+            _save([session])
+        except (IntegrityError, DataError) as e:
+            # La fila es la que falla: solo esta sesión se reintenta
+            _retry(retry, [session], e)
+        except Exception as e:
+            # Falla la base, no la fila: no tiene caso seguir una por una
+            _retry(retry, sessions[index:], e)
+            break
+
+    if retry:
+        with _lock:
+            _buffer[:0] = retry
+
+
+def _retry(retry: list, sessions: list, error: Exception):
+    for user_id, duration, moment, attempts in sessions:
+        if attempts + 1 >= MAX_FLUSH_ATTEMPTS:
+            print(f"Descartando sesión del usuario {user_id} tras {attempts + 1} intentos: {error}")
+        else:
+            retry.append((user_id, duration, moment, attempts + 1))
+
+
+def get_metrics(start_date: date, end_date: date, granularity: str) -> dict:
+    """
+    Obtener métricas de sesiones desde los rollups, por bucket y en total
+    """
+    table = ROLLUP_TABLES[granularity]
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+    if granularity == "day":
+        start, end = start.date(), end.date()
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    cursor.execute(f"""
+        SELECT bucket_start, session_count, total_duration, digest
+        FROM {table}
+        WHERE bucket_start >= %s AND bucket_start < %s
+        ORDER BY bucket_start ASC
+    """, (start, end))
+    rows = cursor.fetchall()
+
+    cursor.close()
+    db.close()
+
+    overall = TDigest()
+    buckets = []
+    total_count = 0
+    total_duration = 0
+
+    for row in rows:
+        digest = TDigest.from_bytes(row['digest'])
+        overall.merge(digest)
+        total_count += row['session_count']
+        total_duration += row['total_duration']
+        buckets.append(_summary(row['bucket_start'], row['session_count'], row['total_duration'], digest))
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "granularity": granularity,
+        "total": _summary(None, total_count, total_duration, overall),
+        "buckets": buckets
+    }
+
+
+def _summary(bucket_start, session_count: int, total_duration: int, digest: TDigest) -> dict:
+    if isinstance(bucket_start, date) and not isinstance(bucket_start, datetime):
+        bucket_start = datetime.combine(bucket_start, time.min)
+
+    return {
+        "bucket_start": bucket_start,
+        "session_count": int(session_count),
+        "total_duration": int(total_duration),
+        "average_duration": round(total_duration / session_count, 2) if session_count else 0.0,
+        "p50_duration": _rounded(digest.quantile(0.5)),
+        "p95_duration": _rounded(digest.quantile(0.95))
+    }
+
+
+def _rounded(value):
+    return round(value, 2) if value is not None else None
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    scheduler.every(FLUSH_INTERVAL_SECONDS, flush, name="session_flush", delay=FLUSH_INTERVAL_SECONDS)
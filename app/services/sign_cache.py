@@ -0,0 +1,55 @@
+from typing import Iterable, List, Optional
+
+from app.database import get_db_connection
+from app.services import favorites_cache
+from app.utils.cache import TTLCache
+
+# Filas de señas por id; views_count puede quedar atrasado hasta que expiren
+_signs = TTLCache(maxsize=5000, ttl=300)
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def get_many(sign_ids: Iterable[int], user_id: Optional[int] = None) -> List[dict]:
+    """
+    Obtener varias señas por id en el orden pedido, con `is_favorite` para el
+    usuario. Las que no están en caché se leen con un solo IN y el favorito
+    sale del conjunto en caché del usuario. Los ids que no existen se omiten.
+    """
+    sign_ids = list(dict.fromkeys(sign_ids))
+    if not sign_ids:
+        return []
+
+    rows = {}
+    misses = []
+
+    for sign_id in sign_ids:
+        row = _signs.get(sign_id)
+        if row is None:
+            misses.append(sign_id)
+        else:
+            rows[sign_id] = row
+
+    if misses:
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute(f"SELECT * FROM signs WHERE id IN ({_placeholders(misses)})", misses)
+
+        for row in cursor.fetchall():
+            _signs.set(row["id"], row)
+            rows[row["id"]] = row
+
+        cursor.close()
+        db.close()
+
+    signs = [dict(rows[sign_id]) for sign_id in sign_ids if sign_id in rows]
+    return favorites_cache.annotate(signs, user_id)
+
+
+def invalidate(sign_id: int):
+    """
+    Descartar la fila en caché de una seña modificada o eliminada
+    """
+    _signs.pop(sign_id)
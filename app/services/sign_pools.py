@@ -0,0 +1,95 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import List, Optional
+
+from app.database import get_db_connection
+
+# Acota cuánto tarda un worker en ver señas creadas o modificadas en otro
+POOLS_TTL_SECONDS = 300
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+class SignPools:
+    """
+    Señas activas agrupadas por categoría y dificultad, ordenadas por id para
+    que un mismo generador con la misma semilla produzca el mismo resultado
+    """
+
+    def __init__(self, signs: List[dict]):
+        self.by_category = defaultdict(lambda: {difficulty: [] for difficulty in DIFFICULTIES})
+        for sign in sorted(signs, key=lambda s: s['id']):
+            self.by_category[sign['category_id']].setdefault(sign['difficulty'], []).append(sign)
+        self.loaded_at = time.monotonic()
+
+    def signs(self, category_id: int, difficulty: Optional[str] = None) -> List[dict]:
+        pools = self.by_category.get(category_id)
+        if not pools:
+            return []
+        if difficulty:
+            return pools.get(difficulty, [])
+        return sorted((sign for pool in pools.values() for sign in pool), key=lambda s: s['id'])
+
+    def all_signs(self, difficulty: Optional[str] = None) -> List[dict]:
+        return sorted(
+            (sign for category_id in self.by_category for sign in self.signs(category_id, difficulty)),
+            key=lambda s: s['id']
+        )
+
+    def version(self, category_id: int) -> str:
+        """
+        Huella de las señas de una categoría; cambia si se agregan, quitan o editan
+        """
+        digest = hashlib.sha1()
+        for sign in self.signs(category_id):
+            digest.update(f"{sign['id']}:{sign['difficulty']}:{sign['word']};".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+
+_lock = threading.Lock()
+_pools = None
+
+
+def _load() -> SignPools:
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT id, category_id, word, video_url, thumbnail_url, image_url, difficulty
+        FROM signs
+        WHERE is_active = TRUE
+    """)
+    signs = cursor.fetchall()
+    cursor.close()
+    db.close()
+    return SignPools(signs)
+
+
+def get_pools() -> SignPools:
+    """
+    Obtener los grupos de señas, recargándolos cuando expiran
+    """
+    global _pools
+
+    with _lock:
+        pools = _pools
+        if pools is not None and time.monotonic() - pools.loaded_at < POOLS_TTL_SECONDS:
+            return pools
+
+    pools = _load()
+
+    with _lock:
+        _pools = pools
+
+    return pools
+
+
+def invalidate():
+    """
+    Descartar los grupos tras crear, modificar o eliminar señas
+    """
+    global _pools
+
+    with _lock:
+        _pools = None
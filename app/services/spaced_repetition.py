@@ -0,0 +1,272 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from app.database import get_db_connection, ensure_schema
+from app.services import events, learned_signs
+from app.utils.cache import TTLCache
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sign_reviews (
+        user_id INT NOT NULL,
+        sign_id INT NOT NULL,
+        repetitions INT NOT NULL DEFAULT 0,
+        interval_days INT NOT NULL DEFAULT 0,
+        ease_factor FLOAT NOT NULL DEFAULT 2.5,
+        due_at DATETIME NOT NULL,
+        last_reviewed_at DATETIME NULL,
+        PRIMARY KEY (user_id, sign_id),
+        KEY idx_sign_reviews_user_due (user_id, due_at)
+    )
+    """,
+]
+
+MIN_EASE_FACTOR = 1.3
+
+# Calidad SM-2 (0-5) con la que se califican las respuestas de los quizzes
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 2
+
+
+def next_review(state: Optional[dict], quality: int, now: datetime) -> dict:
+    """
+    Calcular el siguiente repaso con el algoritmo SM-2
+    """
+    repetitions = state['repetitions'] if state else 0
+    interval_days = state['interval_days'] if state else 0
+    ease_factor = state['ease_factor'] if state else 2.5
+
+    if quality < 3:
+        repetitions = 0
+        interval_days = 1
+    else:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = max(round(interval_days * ease_factor), 1)
+        repetitions += 1
+
+    ease_factor += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    ease_factor = max(ease_factor, MIN_EASE_FACTOR)
+
+    return {
+        "repetitions": repetitions,
+        "interval_days": interval_days,
+        "ease_factor": round(ease_factor, 4),
+        "due_at": now + timedelta(days=interval_days),
+        "last_reviewed_at": now
+    }
+
+
+class ReviewQueue:
+    """
+    Señas de un usuario en un min-heap por fecha de repaso.
+
+    Al reprogramar una seña se agrega otra entrada y la anterior se descarta
+    cuando llega a la cima (borrado perezoso).
+    """
+
+    def __init__(self, due: Dict[int, datetime]):
+        self.due = dict(due)
+        self.heap = [(due_at, sign_id) for sign_id, due_at in self.due.items()]
+        heapq.heapify(self.heap)
+        self.lock = threading.Lock()
+
+    def schedule(self, sign_id: int, due_at: datetime):
+        with self.lock:
+            if self.due.get(sign_id) == due_at:
+                return
+            self.due[sign_id] = due_at
+            heapq.heappush(self.heap, (due_at, sign_id))
+
+    def remove(self, sign_id: int):
+        with self.lock:
+            self.due.pop(sign_id, None)
+
+    def next_due(self, limit: int, now: datetime) -> List[tuple]:
+        """
+        Obtener hasta `limit` señas vencidas en O(k log n)
+        """
+        with self.lock:
+            taken = []
+            while self.heap and len(taken) < limit:
+                due_at, sign_id = self.heap[0]
+                if self.due.get(sign_id) != due_at:
+                    heapq.heappop(self.heap)
+                    continue
+                if due_at > now:
+                    break
+                taken.append(heapq.heappop(self.heap))
+
+            for entry in taken:
+                heapq.heappush(self.heap, entry)
+
+            return [(sign_id, due_at) for due_at, sign_id in taken]
+
+
+_queues = TTLCache(maxsize=5000, ttl=600)
+
+
+def get_queue(user_id: int) -> ReviewQueue:
+    def load():
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("SELECT sign_id, due_at FROM sign_reviews WHERE user_id = %s", (user_id,))
+        due = {row['sign_id']: row['due_at'] for row in cursor.fetchall()}
+        cursor.close()
+        db.close()
+        return ReviewQueue(due)
+
+    return _queues.get_or_load(user_id, load)
+
+
+def _placeholders(values) -> str:
+    return ", ".join(["%s"] * len(values))
+
+
+def record_reviews(user_id: int, qualities: Dict[int, int]) -> List[dict]:
+    """
+    Registrar el resultado de repasar varias señas y reprogramarlas
+    """
+    if not qualities:
+        return []
+
+    now = datetime.now().replace(microsecond=0)
+    sign_ids = list(qualities)
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute(f"""
+            SELECT * FROM sign_reviews
+            WHERE user_id = %s AND sign_id IN ({_placeholders(sign_ids)})
+            FOR UPDATE
+        """, [user_id] + sign_ids)
+        states = {row['sign_id']: row for row in cursor.fetchall()}
+
+        reviews = []
+        for sign_id in sign_ids:
+            review = next_review(states.get(sign_id), qualities[sign_id], now)
+            review.update(user_id=user_id, sign_id=sign_id)
+            reviews.append(review)
+
+        cursor.executemany("""
+            INSERT INTO sign_reviews
+            (user_id, sign_id, repetitions, interval_days, ease_factor, due_at, last_reviewed_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                repetitions = VALUES(repetitions),
+                interval_days = VALUES(interval_days),
+                ease_factor = VALUES(ease_factor),
+                due_at = VALUES(due_at),
+                last_reviewed_at = VALUES(last_reviewed_at)
+        """, [
+            (user_id, r['sign_id'], r['repetitions'], r['interval_days'],
+             r['ease_factor'], r['due_at'], r['last_reviewed_at'])
+            for r in reviews
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    queue = _queues.get(user_id)
+    if queue is not None:
+        for review in reviews:
+            queue.schedule(review['sign_id'], review['due_at'])
+
+    return reviews
+
+
+def add_signs(user_id: int, sign_ids: Iterable[int]):
+    """
+    Agregar señas recién aprendidas a los repasos; las que ya estaban no cambian
+    """
+    sign_ids = list(dict.fromkeys(sign_ids))
+    if not sign_ids:
+        return
+
+    due_at = datetime.now().replace(microsecond=0) + timedelta(days=1)
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.executemany("""
+        INSERT IGNORE INTO sign_reviews (user_id, sign_id, due_at)
+        VALUES (%s, %s, %s)
+    """, [(user_id, sign_id, due_at) for sign_id in sign_ids])
+    db.commit()
+    cursor.close()
+    db.close()
+
+    # Más simple recargar que averiguar cuáles se insertaron
+    _queues.pop(user_id)
+
+
+def due_reviews(user_id: int, limit: int = 20, now: Optional[datetime] = None) -> List[tuple]:
+    """
+    Obtener las siguientes señas vencidas como (sign_id, due_at).
+
+    La cola es de este worker y no ve los repasos respondidos en otros, así
+    que cada candidata se compara con `sign_reviews.due_at`; las que cambiaron
+    se reprograman en la cola y se buscan otras.
+    """
+    now = now or datetime.now()
+    queue = get_queue(user_id)
+
+    while True:
+        due = queue.next_due(limit, now)
+        if not due:
+            return []
+
+        db = get_db_connection()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT sign_id, due_at FROM sign_reviews
+            WHERE user_id = %s AND sign_id IN ({_placeholders(due)})
+        """, [user_id] + [sign_id for sign_id, _ in due])
+        stored = {row['sign_id']: row['due_at'] for row in cursor.fetchall()}
+        cursor.close()
+        db.close()
+
+        stale = [(sign_id, due_at) for sign_id, due_at in due if stored.get(sign_id) != due_at]
+        if not stale:
+            return due
+
+        for sign_id, _ in stale:
+            if sign_id in stored:
+                queue.schedule(sign_id, stored[sign_id])
+            else:
+                queue.remove(sign_id)
+
+
+def on_quiz_attempt_saved(user_id: int, answers: Iterable[dict] = (), **_):
+    # Solo se repasan las señas aprendidas; una con alguna respuesta
+    # incorrecta en el intento cuenta como fallada
+    answers = [answer for answer in answers if answer['sign_id'] is not None]
+    learned = learned_signs.learned_among(user_id, [answer['sign_id'] for answer in answers])
+
+    qualities = {}
+    for answer in answers:
+        if answer['sign_id'] not in learned:
+            continue
+        quality = QUALITY_CORRECT if answer['correct'] else QUALITY_WRONG
+        qualities[answer['sign_id']] = min(quality, qualities.get(answer['sign_id'], quality))
+    record_reviews(user_id, qualities)
+
+
+def on_signs_learned(user_id: int, sign_ids: Iterable[int], **_):
+    add_signs(user_id, sign_ids)
+
+
+def setup():
+    ensure_schema(SCHEMA)
+    events.subscribe(events.QUIZ_ATTEMPT_SAVED, on_quiz_attempt_saved)
+    events.subscribe(events.SIGNS_LEARNED, on_signs_learned)
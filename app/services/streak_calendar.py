@@ -0,0 +1,130 @@
+import base64
+from array import array
+from datetime import date, timedelta
+from typing import List
+
+from app.database import get_db_connection
+from app.utils.cache import TTLCache
+from app.utils.dates import local_today
+
+# Un año completo más el día actual
+WINDOW_DAYS = 366
+
+_calendars = TTLCache(maxsize=20000, ttl=600)
+
+
+class YearCalendar:
+    """
+    Actividades por día de un usuario en la ventana que termina en `end_date`;
+    el índice 0 es el día más antiguo
+    """
+
+    def __init__(self, end_date: date, counts: array):
+        self.end_date = end_date
+        self.counts = counts
+
+    @property
+    def start_date(self) -> date:
+        return self.end_date - timedelta(days=WINDOW_DAYS - 1)
+
+    def roll_to(self, day: date):
+        shift = (day - self.end_date).days
+        if shift <= 0:
+            return
+        if shift >= WINDOW_DAYS:
+            self.counts = array("H", [0] * WINDOW_DAYS)
+        else:
+            self.counts = self.counts[shift:] + array("H", [0] * shift)
+        self.end_date = day
+
+
+def _load(user_id: int, today: date) -> YearCalendar:
+    calendar = YearCalendar(today, array("H", [0] * WINDOW_DAYS))
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT streak_date, activities_completed
+        FROM user_streaks
+        WHERE user_id = %s AND streak_date >= %s AND streak_date <= %s
+    """, (user_id, calendar.start_date, today))
+    rows = cursor.fetchall()
+    cursor.close()
+    db.close()
+
+    for row in rows:
+        index = (row['streak_date'] - calendar.start_date).days
+        calendar.counts[index] = min(row['activities_completed'], 0xFFFF)
+
+    return calendar
+
+
+def get_calendar(user_id: int) -> YearCalendar:
+    today = local_today()
+    calendar = _calendars.get(user_id)
+    if calendar is None:
+        calendar = _load(user_id, today)
+        _calendars.set(user_id, calendar)
+    else:
+        calendar.roll_to(today)
+    return calendar
+
+
+def record_activity(user_id: int):
+    """
+    Sumar una actividad de hoy al calendario en caché, si existe
+    """
+    calendar = _calendars.get(user_id)
+    if calendar is None:
+        return
+    calendar.roll_to(local_today())
+    if calendar.counts[-1] < 0xFFFF:
+        calendar.counts[-1] += 1
+
+
+def active_days(user_id: int, days: int) -> List[dict]:
+    """
+    Días con actividad de los últimos `days` días (más hoy), del más reciente
+    al más antiguo
+    """
+    calendar = get_calendar(user_id)
+    result = []
+    for offset in range(min(days + 1, WINDOW_DAYS)):
+        count = calendar.counts[-1 - offset]
+        if count:
+            result.append({
+                "streak_date": calendar.end_date - timedelta(days=offset),
+                "activities_completed": count
+            })
+    return result
+
+
+def compact(user_id: int, days: int) -> dict:
+    """
+    Representación compacta de los últimos `days` días terminando hoy: un
+    bitmap en base64 (bit i = día start_date + i, LSB primero) y las
+    actividades por día codificadas por tramos [valor, repeticiones]
+    """
+    calendar = get_calendar(user_id)
+    counts = calendar.counts[-days:]
+
+    bitmap = bytearray((days + 7) // 8)
+    for index, count in enumerate(counts):
+        if count:
+            bitmap[index // 8] |= 1 << (index % 8)
+
+    runs = []
+    for count in counts:
+        if runs and runs[-1][0] == count:
+            runs[-1][1] += 1
+        else:
+            runs.append([count, 1])
+
+    return {
+        "start_date": calendar.end_date - timedelta(days=days - 1),
+        "end_date": calendar.end_date,
+        "days": days,
+        "active_days": sum(1 for count in counts if count),
+        "bitmap": base64.b64encode(bytes(bitmap)).decode("ascii"),
+        "counts_rle": runs
+    }
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from typing import Optional
+
+from app.database import get_db_connection, ensure_unique_key
+from app.utils.cache import TTLCache
+from app.utils.dates import local_today
+
+# Días repetidos por usuario que impedirían crear el índice único: las
+# actividades se suman en la fila de menor id y las demás se eliminan
+DEDUPE = [
+    """
+    UPDATE user_streaks s
+    JOIN (
+        SELECT user_id, streak_date, MIN(id) as keep_id, SUM(activities_completed) as activities
+        FROM user_streaks
+        GROUP BY user_id, streak_date
+        HAVING COUNT(*) > 1
+    ) g ON s.id = g.keep_id
+    SET s.activities_completed = g.activities
+    """,
+    """
+    DELETE s FROM user_streaks s
+    JOIN user_streaks k
+        ON k.user_id = s.user_id AND k.streak_date = s.streak_date AND k.id < s.id
+    """,
+]
+
+# user_id -> (último día activo, racha actual, racha más larga)
+_last_activity = TTLCache(maxsize=50000, ttl=2 * 24 * 3600)
+
+
+def record_activity(user_id: int) -> Optional[dict]:
+    """
+    Registrar actividad del usuario hoy y actualizar su racha.
+
+    La transición es atómica: el upsert en user_streaks (con índice único por
+    usuario y día) decide quién registra la primera actividad del día, y solo
+    esa petición ejecuta el UPDATE condicional de la racha. Los valores se
+    devuelven desde memoria cuando la caché prueba que están al día; solo se
+    leen de la base si otro worker pudo haberlos cambiado.
+
+    Retorna None si el usuario no existe.
+    """
+    today = local_today()
+    yesterday = today - timedelta(days=1)
+    cached = _last_activity.get(user_id)
+
+    db = get_db_connection()
+    cursor = db.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            INSERT INTO user_streaks (user_id, streak_date, activities_completed)
+            VALUES (%s, %s, 1)
+            ON DUPLICATE KEY UPDATE activities_completed = activities_completed + 1
+        """, (user_id, today))
+        first_today = cursor.rowcount == 1
+
+        result = None
+
+        if first_today:
+            # Continúa la racha si hubo actividad ayer; si no, reinicia a 1
+            cursor.execute("""
+                UPDATE users
+                SET current_streak = IF(
+                        EXISTS(SELECT 1 FROM user_streaks WHERE user_id = %s AND streak_date = %s),
+                        current_streak + 1,
+                        1
+                    ),
+                    longest_streak = GREATEST(longest_streak, current_streak)
+                WHERE id = %s
+            """, (user_id, yesterday, user_id))
+
+            if cached and cached[0] == yesterday:
+                current_streak = cached[1] + 1
+                result = (current_streak, max(cached[2], current_streak))
+        elif cached and cached[0] == today:
+            result = (cached[1], cached[2])
+
+        if result is None:
+            cursor.execute("SELECT current_streak, longest_streak FROM users WHERE id = %s", (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                db.rollback()
+                return None
+            result = (user['current_streak'], user['longest_streak'])
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+        db.close()
+
+    _last_activity.set(user_id, (today, result[0], result[1]))
+
+    return {
+        "current_streak": result[0],
+        "longest_streak": result[1],
+        "first_activity_today": first_today
+    }
+
+
+def setup():
+    # record_activity depende del índice para saber cuál es la primera actividad del día
+    ensure_unique_key(
+        "user_streaks",
+        "uq_user_streaks_user_date",
+        ["user_id", "streak_date"],
+        dedupe=DEDUPE
+    )
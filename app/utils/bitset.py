@@ -0,0 +1,57 @@
+from typing import Iterable, Iterator, Optional
+
+
+class Bitset:
+    """
+    Conjunto de enteros no negativos guardado como los bits de un entero.
+
+    Se serializa en little-endian con el mínimo de bytes necesario, así un
+    conjunto de cientos de posiciones ocupa unas decenas de bytes.
+    """
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "Bitset":
+        return cls(int.from_bytes(data or b"", "little"))
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[int]) -> "Bitset":
+        bitset = cls()
+        for position in positions:
+            bitset.set(position)
+        return bitset
+
+    def to_bytes(self) -> bytes:
+        return self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+
+    def set(self, position: int) -> bool:
+        """
+        Encender una posición; retorna True si antes estaba apagada
+        """
+        mask = 1 << position
+        if self.bits & mask:
+            return False
+        self.bits |= mask
+        return True
+
+    def test(self, position: int) -> bool:
+        return (self.bits >> position) & 1 == 1
+
+    def count(self, mask: Optional["Bitset"] = None) -> int:
+        """
+        Número de posiciones encendidas, opcionalmente solo dentro de `mask`
+        """
+        bits = self.bits if mask is None else self.bits & mask.bits
+        return bin(bits).count("1")
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def __contains__(self, position: int) -> bool:
+        return self.test(position)
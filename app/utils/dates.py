@@ -0,0 +1,39 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+_timezone = ZoneInfo(settings.APP_TIMEZONE)
+
+
+def local_now() -> datetime:
+    """
+    Fecha y hora actual en la zona horaria de la aplicación
+    """
+    return datetime.now(_timezone)
+
+
+def local_today() -> date:
+    """
+    Fecha actual en la zona horaria de la aplicación (el día cambia a la
+    medianoche de esa zona, no la del servidor)
+    """
+    return local_now().date()
+
+
+def to_local_naive(moment: datetime) -> datetime:
+    """
+    Convertir a hora local de la aplicación sin zona horaria ni microsegundos,
+    como se guarda en una columna DATETIME. Una hora sin zona se toma como
+    hora local de la aplicación.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(_timezone)
+    return moment.replace(tzinfo=None, microsecond=0)
+
+
+def from_local_naive(moment: datetime) -> datetime:
+    """
+    Agregar la zona horaria de la aplicación a una hora leída de un DATETIME
+    """
+    return moment.replace(tzinfo=_timezone)
@@ -0,0 +1,54 @@
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """
+    Estimador de cardinalidad HyperLogLog.
+
+    Con `precision` = 12 usa 4096 registros de un byte (4 KB) y tiene un error
+    típico de ~1.6%. Dos sketches con la misma precisión se combinan tomando el
+    máximo de cada registro, por lo que la unión de varios días es exacta en
+    términos del sketch.
+    """
+
+    def __init__(self, precision: int = 12, registers: bytes = None):
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is not None:
+            if len(registers) != self.size:
+                raise ValueError("Tamaño de registros inválido para la precisión")
+            self.registers = bytearray(registers)
+        else:
+            self.registers = bytearray(self.size)
+
+    def add(self, item):
+        digest = hashlib.blake2b(str(item).encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        index = value >> (64 - self.precision)
+        remainder = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("No se pueden combinar sketches de distinta precisión")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para cardinalidades pequeñas (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, precision: int = 12) -> "HyperLogLog":
+        return cls(precision, data)
@@ -0,0 +1,107 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+
+class Job:
+    """
+    Tarea registrada en el planificador
+    """
+
+    def __init__(self, func: Callable, interval: Optional[float] = None, name: Optional[str] = None):
+        self.func = func
+        self.interval = interval
+        self.name = name or func.__name__
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    Ejecuta tareas periódicas y programadas en un solo hilo de fondo.
+
+    Las tareas se guardan en una cola de prioridad por hora de ejecución y el
+    hilo duerme hasta la siguiente, sin sondeos. Cada worker de gunicorn tiene
+    su propio planificador, por lo que las tareas deben ser idempotentes.
+    """
+
+    def __init__(self):
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def every(self, seconds: float, func: Callable, name: Optional[str] = None, delay: float = 0) -> Job:
+        """
+        Registrar una tarea que se repite cada `seconds` segundos
+        """
+        job = Job(func, interval=seconds, name=name)
+        self._push(time.monotonic() + delay, job)
+        return job
+
+    def at(self, when: datetime, func: Callable, name: Optional[str] = None) -> Job:
+        """
+        Registrar una tarea para ejecutarse una sola vez en `when` (hora local)
+        """
+        job = Job(func, name=name)
+        if when.tzinfo is not None:
+            when = when.astimezone().replace(tzinfo=None)
+        delay = max((when - datetime.now()).total_seconds(), 0)
+        self._push(time.monotonic() + delay, job)
+        return job
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="lsm-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _push(self, run_at: float, job: Job):
+        with self._condition:
+            heapq.heappush(self._queue, (run_at, next(self._sequence), job))
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                if not self._queue:
+                    self._condition.wait()
+                    continue
+                run_at, _, job = self._queue[0]
+                delay = run_at - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._queue)
+
+            if job.cancelled:
+                continue
+
+            try:
+                job.func()
+            except Exception as e:
+                print(f"Error en tarea programada '{job.name}': {e}")
+
+            if job.interval is not None and not job.cancelled:
+                self._push(time.monotonic() + job.interval, job)
+
+
+scheduler = Scheduler()
@@ -0,0 +1,121 @@
+import math
+from array import array
+from typing import Optional
+
+
+class TDigest:
+    """
+    t-digest combinable para estimar percentiles (variante "merging").
+
+    Mantiene como máximo ~`compression` centroides (media, peso), con más
+    resolución en las colas. Dos digests se combinan reagrupando sus
+    centroides, lo que permite sumar rollups por hora en rollups por día o
+    por cualquier rango.
+    """
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.centroids = []
+        self.total_weight = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    def add(self, value: float, weight: float = 1):
+        self._buffer.append((float(value), float(weight)))
+        self.total_weight += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        other._compress()
+        if not other.centroids:
+            return
+        self._buffer.extend(other.centroids)
+        self.total_weight += other.total_weight
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        target = q * self.total_weight
+        previous_position, previous_mean = 0.0, self.min
+        cumulative = 0.0
+
+        for mean, weight in self.centroids:
+            position = cumulative + weight / 2
+            if target <= position:
+                return self._interpolate(target, previous_position, previous_mean, position, mean)
+            previous_position, previous_mean = position, mean
+            cumulative += weight
+
+        return self._interpolate(target, previous_position, previous_mean, self.total_weight, self.max)
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        values = array("d", [self.min, self.max])
+        for mean, weight in self.centroids:
+            values.append(mean)
+            values.append(weight)
+        return values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, compression: float = 100) -> "TDigest":
+        digest = cls(compression)
+        values = array("d")
+        values.frombytes(data)
+        if len(values) >= 2:
+            digest.min, digest.max = values[0], values[1]
+            digest.centroids = [(values[i], values[i + 1]) for i in range(2, len(values), 2)]
+            digest.total_weight = sum(weight for _, weight in digest.centroids)
+        return digest
+
+    @staticmethod
+    def _interpolate(target, left_position, left_value, right_position, right_value):
+        if right_position <= left_position:
+            return right_value
+        fraction = (target - left_position) / (right_position - left_position)
+        return left_value + fraction * (right_value - left_value)
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k: float) -> float:
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+
+        items = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in items)
+
+        merged = []
+        weight_so_far = 0.0
+        current_mean, current_weight = items[0]
+        q_limit = self._q(self._k(0) + 1)
+
+        for mean, weight in items[1:]:
+            proposed = current_weight + weight
+            if (weight_so_far + proposed) / total <= q_limit:
+                current_mean += (mean - current_mean) * weight / proposed
+                current_weight = proposed
+            else:
+                merged.append((current_mean, current_weight))
+                weight_so_far += current_weight
+                q_limit = self._q(self._k(weight_so_far / total) + 1)
+                current_mean, current_weight = mean, weight
+
+        merged.append((current_mean, current_weight))
+        self.centroids = merged
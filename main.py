@@ -15,8 +15,28 @@ from app.routes import (
     achievements,
     statistics,
     users,
-    videos
+    videos,
+    review
 )
+from app.services import (
+    admin_stats,
+    category_counts,
+    active_users,
+    session_analytics,
+    achievement_engine,
+    challenge_scheduler,
+    challenge_progress,
+    streaks,
+    news_publisher,
+    favorites_cache,
+    progress_events,
+    learned_signs,
+    spaced_repetition,
+    adaptive_quiz,
+    quiz_analytics,
+    quiz_summaries
+)
+from app.utils.scheduler import scheduler
 from pathlib import Path
 
 # Inicializar Firebase antes de cualquier otra cosa
@@ -52,6 +72,7 @@ app.include_router(signs.router)
 app.include_router(videos.router)
 app.include_router(favorites.router)
 app.include_router(progress.router)
+app.include_router(review.router)
 app.include_router(quizzes.router)
 app.include_router(news.router)
 app.include_router(memory_game.router)
@@ -59,6 +80,43 @@ app.include_router(challenges.router)
 app.include_router(achievements.router)
 app.include_router(statistics.router)
 
+# Tareas en segundo plano
+@app.on_event("startup")
+def start_background_jobs():
+    admin_stats.setup()
+    category_counts.setup()
+    active_users.setup()
+    session_analytics.setup()
+    achievement_engine.setup()
+    challenge_scheduler.setup()
+    challenge_progress.setup()
+    streaks.setup()
+    news_publisher.setup()
+    favorites_cache.setup()
+    progress_events.setup()
+    learned_signs.setup()
+    spaced_repetition.setup()
+    adaptive_quiz.setup()
+    quiz_analytics.setup()
+    quiz_summaries.setup()
+    scheduler.start()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    scheduler.stop()
+    
+    # Guardar lo que quede pendiente en memoria
+    for flush in (
+        active_users.flush,
+        session_analytics.flush,
+        challenge_progress.flush,
+        quiz_analytics.flush
+    ):
+        try:
+            flush()
+        except Exception as e:
+            print(f"Error guardando datos pendientes: {e}")
+
 @app.get("/")
 def home():
     return {